@@ -7,3 +7,5 @@ This is very much a WORK IN PROGRESS. Nothing here is final.
 
 Feel free to email me at stuff255@outlook.com
 """
+
+__version__ = "0.1"
@@ -0,0 +1,106 @@
+"""Closed form flights for mediums with no drag, lift or torque.
+
+With a density of 0 the only force left is gravity, so a projectile
+flies a parabola and every question about its flight has an exact
+answer. Everything here works on floats or numpy arrays of shots.
+"""
+import math
+
+import numpy as np
+
+from ballistics.mediums import Fluid
+from ballistics.mediums import Gas
+from ballistics.mediums import Medium
+
+
+def drag_free(medium: Medium) -> bool:
+    """Whether gravity is the only force the medium exerts."""
+    # Subclasses may add forces of their own, so only the known types are trusted
+    return type(medium) in (Medium, Fluid, Gas) and medium.density == 0
+
+
+class Parabola:
+    """The flight of a projectile under gravity alone, starting from x = y = 0 at time 0."""
+    __slots__ = ("vel_x", "vel_y", "g")
+
+    def __init__(self, velocity, angle, g):
+        """
+        velocity - launch velocity in m/s
+        angle - launch angle in rad
+        g - gravitational acceleration in m/s^2
+        """
+        # Same clamp as Projectile.tick, which also keeps the angle finite
+        self.vel_x = np.maximum(np.cos(angle) * velocity, 0.000000000001)
+        self.vel_y = np.sin(angle) * velocity
+        self.g = g
+
+    def position(self, time) -> tuple:
+        """Dist and drop in m at the time."""
+        return self.vel_x * time, self.vel_y * time - self.g * time**2 / 2
+
+    def state(self, time) -> tuple:
+        """Velocity in m/s and angle in rad at the time."""
+        vel_y = self.vel_y - self.g * time
+        return (self.vel_x**2 + vel_y**2)**.5, np.arctan(vel_y / self.vel_x)
+
+    def time_at_dist(self, dist):
+        """Time at which the dist is reached."""
+        return dist / self.vel_x
+
+    def apex(self) -> tuple:
+        """Time, dist and drop of the highest point, the start if it only falls."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            time = np.where(self.vel_y <= 0, 0.0, np.where(self.g > 0, self.vel_y / self.g, math.inf))
+            x, y = self.position(time)
+        # Without gravity a shot going up rises forever
+        return time, x, np.where(np.isinf(time), math.inf, y)
+
+    def time_at_drop(self, drop):
+        """First time the drop falls to -drop, 0 if it starts below, inf if never.
+
+        Like the stepped flights, which stop once the drop is below
+        -drop, a shot starting at exactly -drop, such as with a drop of
+        0, only stops when it comes back down to it.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            falling = (self.vel_y + (self.vel_y**2 + 2 * self.g * drop)**.5) / self.g
+            drifting = np.where(self.vel_y < 0, drop / -self.vel_y, math.inf)
+            time = np.where(self.g > 0, falling, drifting)
+        return np.where(drop < 0, 0.0, time)
+
+    def time_at_rise(self, rise):
+        """First time the drop is above rise, inf if never."""
+        _, _, top = self.apex()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rising = (self.vel_y - np.maximum(self.vel_y**2 - 2 * self.g * rise, 0)**.5) / self.g
+            drifting = rise / self.vel_y
+            time = np.where(self.g > 0, rising, drifting)
+        return np.where(rise < 0, 0.0, np.where(top > rise, time, math.inf))
+
+    def impact(self, drop) -> tuple:
+        """Time and dist at which the drop reaches -drop, inf if never."""
+        time = self.time_at_drop(drop)
+        return time, self.vel_x * time
+
+
+def max_range(velocity, drop, g) -> tuple:
+    """Launch angle in rad for the max range to a drop of -drop, and that range in m."""
+    velocity = np.asarray(velocity, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        landing = (velocity**2 + 2 * g * drop)**.5
+        angle = np.where(g > 0, np.arctan(velocity / landing), 0.0)
+        range = np.where(g > 0, velocity / g * landing, math.inf)
+    return angle, range
+
+
+def aim(velocity: float, x: float, y: float, g: float) -> float:
+    """The lowest launch angle in rad that passes through dist x and drop y.
+
+    Raises ValueError if the point is out of reach.
+    """
+    if g == 0:
+        return math.atan2(y, x)
+    root = velocity**4 - g * (g * x**2 + 2 * y * velocity**2)
+    if root < 0:
+        raise ValueError(f"a shot at {velocity} m/s can't reach a drop of {y} m at {x} m")
+    return math.atan((velocity**2 - root**.5) / (g * x))
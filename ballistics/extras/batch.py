@@ -0,0 +1,176 @@
+"""Projectiles stored as arrays, for simulating many shots at once."""
+import numpy as np
+
+from ballistics.guns import Gun
+from ballistics.mediums import Medium
+from ballistics.projectiles import GolfBall
+from ballistics.projectiles import Projectile
+from ballistics.projectiles import Spec
+from ballistics.projectiles import Sphere
+from ballistics.projectiles import golf_ball_cd_crisis
+from ballistics.projectiles import golf_ball_cd_recovery
+from ballistics.projectiles import golf_ball_cl
+from ballistics.projectiles import sphere_cd_laminar
+from ballistics.projectiles import sphere_cd_spun
+from ballistics.projectiles import sphere_cd_turbulent
+from ballistics.projectiles import sphere_cl
+from ballistics.projectiles import sphere_ct
+
+
+class SphereBatch(Sphere):
+    """Many smooth spheres. Every attribute is an array, one entry per shot."""
+
+    def __init__(self, mass, diameter, i_mod=.4, velocity=0.0, angular_velocity=0.0, angle=0.0):
+        """
+        mass - in kg
+        diameter - in m
+        i_mod - constant k for moment of intertia = k * mr^2
+        velocity - in m/s
+        angular_velocity - in rad/s
+        angle - in rad
+        """
+        mass, diameter, i_mod, self.velocity, self.angular_velocity, self.angle = (
+            np.array(a, dtype=float) for a in np.broadcast_arrays(mass, diameter, i_mod, velocity, angular_velocity, angle))
+        self.spec = Spec(type(self), mass, diameter, i_mod)
+
+    def __len__(self) -> int:
+        return len(self.mass)
+
+    def subset(self, index) -> "SphereBatch":
+        """A new batch with only the selected shots."""
+        return type(self)(self.mass[index], self.diameter[index], self.i_mod[index],
+                          self.velocity[index], self.angular_velocity[index], self.angle[index])
+
+    @property
+    def vel_x(self) -> np.ndarray:
+        return np.cos(self.angle) * self.velocity
+
+    @property
+    def vel_y(self) -> np.ndarray:
+        return np.sin(self.angle) * self.velocity
+
+    def cd(self, medium: "Medium") -> np.ndarray:
+        re = self.re(medium)
+        low = re < 9000
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Only evaluate the formulas some shot needs
+            if low.all():
+                cd0 = sphere_cd_laminar(re)
+            else:
+                cd0 = sphere_cd_turbulent(re)
+                if low.any():
+                    cd0 = np.where(low, sphere_cd_laminar(re), cd0)
+            spinning = self.angular_velocity > 0
+            if not spinning.any():
+                return cd0
+            spun = sphere_cd_spun(cd0, self.w / self.velocity)
+        return np.where(spinning, spun, cd0)
+
+    def cl(self, medium: "Medium") -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vu = self.w / self.velocity
+            if not vu.any():
+                return np.zeros_like(vu)
+            cl = sphere_cl(vu)
+        return np.where(vu == 0, 0, cl)
+
+    def ct(self, medium: "Medium") -> np.ndarray:
+        rew = self.rew(medium)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ct = sphere_ct(rew)
+        return np.where(rew > 0, ct, 0)
+
+
+class GolfBallBatch(SphereBatch, GolfBall):
+    """Many golf balls. Every attribute is an array, one entry per shot."""
+
+    def __init__(self, mass, diameter, i_mod=.3, velocity=0.0, angular_velocity=0.0, angle=0.0):
+        super().__init__(mass, diameter, i_mod, velocity, angular_velocity, angle)
+
+    def cd(self, medium: "Medium") -> np.ndarray:
+        re = self.re(medium)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.select([re < 9000, re < 50000, re < 100000, re < 200000],
+                             [sphere_cd_laminar(re), .5, golf_ball_cd_crisis(re), golf_ball_cd_recovery(re)],
+                             .4)
+
+    def cl(self, medium: "Medium") -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vu = self.w / self.velocity
+        if not vu.any():
+            return np.zeros_like(vu)
+        return np.select([vu > .3, vu == 0], [.3, 0], golf_ball_cl(vu))
+
+    def ct(self, medium: "Medium") -> np.ndarray:
+        # GolfBall.ct has no zero spin guard, but Fluid.torque is only
+        # applied to spinning shots so the masked entries don't matter.
+        return super().ct(medium)
+
+
+# Scalar projectile class to its array counterpart
+batch_types = {Sphere: SphereBatch, GolfBall: GolfBallBatch}
+
+
+def tick(projectiles: SphereBatch, medium: "Medium", time: float) -> tuple[np.ndarray, np.ndarray]:
+    """Progress time for every shot, apply forces return x/y distances traveled.
+
+    Mirrors Projectile.tick step for step.
+    """
+    dist = time * projectiles.velocity
+    old_angle = projectiles.angle
+
+    # Directional force
+    force_dir = -medium.drag(projectiles)
+    force_dir -= medium.crush(projectiles)
+
+    # Perpendicular lift force
+    force_perp = medium.lift(projectiles)
+
+    # Vertical gravitational force
+    force_y = -medium.gravity(projectiles)
+    force_y += medium.buoyant(projectiles)
+
+    # Apply linear forces
+    cos = np.cos(projectiles.angle)
+    sin = np.sin(projectiles.angle)
+    vel_x = cos * projectiles.velocity + (force_dir * cos + force_perp * sin) / projectiles.mass * time
+    vel_y = sin * projectiles.velocity + (force_y + force_dir * sin + force_perp * cos) / projectiles.mass * time
+
+    vel_x = np.where(vel_x < 0, 0.000000000001, vel_x)
+    projectiles.velocity = (vel_x**2 + vel_y**2)**0.5
+    projectiles.angle = np.arctan(vel_y / vel_x)
+
+    # Spin decay, only for shots that are spinning
+    spinning = projectiles.angular_velocity != 0
+    if spinning.any():
+        with np.errstate(divide="ignore", invalid="ignore"):
+            decay = medium.torque(projectiles) / projectiles.mofinertia * time
+        projectiles.angular_velocity = np.where(spinning, projectiles.angular_velocity - decay, projectiles.angular_velocity)
+
+    # Total distance traveled
+    return dist * np.cos(old_angle), dist * np.sin(old_angle)
+
+
+def from_pairs(pairs: "list[tuple[Projectile, Gun]]") -> list[tuple[np.ndarray, SphereBatch]]:
+    """Group projectile/gun pairs into batches of the same projectile type.
+
+    Returns a list of (indices into pairs, batch) tuples. The projectiles
+    and guns aren't modified.
+    """
+    groups = {}
+    for i, (projectile, gun) in enumerate(pairs):
+        if type(projectile) not in batch_types:
+            raise TypeError(f"can't batch {type(projectile).__name__} projectiles")
+        groups.setdefault(type(projectile), []).append(i)
+    batches = []
+    for kind, index in groups.items():
+        columns = [(p.mass, p.diameter, p.i_mod, g.vel(p), g.spin(p), g.angle) for p, g in (pairs[i] for i in index)]
+        batches.append((np.array(index), batch_types[kind](*zip(*columns))))
+    return batches
+
+
+def from_spec(spec: Spec, velocity=0.0, angular_velocity=0.0, angle=0.0) -> SphereBatch:
+    """Shots of one projectile spec, launch values are broadcast like arrays."""
+    if spec.kind not in batch_types:
+        raise TypeError(f"can't batch {spec.kind.__name__} projectiles")
+    return batch_types[spec.kind](spec.mass, spec.diameter, spec.i_mod, velocity, angular_velocity, angle)
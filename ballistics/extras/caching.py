@@ -0,0 +1,167 @@
+"""A persistent cache of simulation results, keyed by their inputs.
+
+Every input that can change a result, the projectile spec and launch
+state, the gun, the medium, the integrator settings and the library
+version, is hashed into the key. Results are stored as one .npy file per
+column and are memory mapped when read back, so a hit doesn't copy or
+parse the data. The cache is kept under a size cap by removing the least
+recently used entries.
+"""
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+import ballistics
+from ballistics.projectiles import FlightState
+from ballistics.projectiles import Projectile
+from ballistics.projectiles import Spec
+
+# Default cache directory, can be overridden with the BALLISTICS_CACHE environment variable
+DEFAULT_PATH = os.environ.get("BALLISTICS_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "ballistics"))
+
+_default = None
+
+
+class Cache:
+    """A directory of cached results, each entry a directory of columns."""
+
+    def __init__(self, path: str = DEFAULT_PATH, max_bytes: int = 256 * 2**20):
+        """
+        path - directory to store entries in, created if needed
+        max_bytes - total size the entries are trimmed to
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, kind: str, **inputs) -> str:
+        """A stable hash of the kind of result and every input it depends on."""
+        inputs = {"kind": kind, "version": ballistics.__version__, **inputs}
+        text = json.dumps(inputs, sort_keys=True, default=describe)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get(self, key: str) -> tuple[dict[str, np.ndarray], FlightState | None] | None:
+        """The memory mapped columns and the final state stored for the key, or None."""
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, "entry.json")) as f:
+                meta = json.load(f)
+            columns = {name: _load(os.path.join(entry, f"{i}.npy")) for i, name in enumerate(meta["columns"])}
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        # Entries are evicted by their last use
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        state = meta["state"] and FlightState(*meta["state"])
+        return columns, state
+
+    def put(self, key: str, columns: dict, state: FlightState | None = None) -> bool:
+        """Store numeric columns and the final state for the key.
+
+        Returns False without storing anything if a column isn't numeric.
+        """
+        arrays = {}
+        for name, values in columns.items():
+            array = np.asarray(values)
+            if array.dtype.kind not in "biuf":
+                return False
+            arrays[name] = array
+        os.makedirs(self.path, exist_ok=True)
+        # Write into a temporary directory then rename it, so entries are complete or missing
+        temp = os.path.join(self.path, f"tmp-{uuid.uuid4().hex}")
+        os.makedirs(temp)
+        for i, array in enumerate(arrays.values()):
+            np.save(os.path.join(temp, f"{i}.npy"), array)
+        meta = {"columns": list(arrays),
+                "state": state and [state.velocity, state.angle, state.angular_velocity]}
+        with open(os.path.join(temp, "entry.json"), "w") as f:
+            json.dump(meta, f)
+        entry = self._entry(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        try:
+            os.rename(temp, entry)
+        except OSError:
+            # Another process stored the same entry first
+            shutil.rmtree(temp, ignore_errors=True)
+        self.evict()
+        return True
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for entry in self._entries():
+            try:
+                size = sum(f.stat().st_size for f in os.scandir(entry))
+                entries.append((os.stat(entry).st_mtime, size, entry))
+            except FileNotFoundError:
+                continue
+            total += size
+        entries.sort()
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """Remove every entry."""
+        for entry in self._entries():
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def size(self) -> int:
+        """Total size of the entries in bytes."""
+        return sum(f.stat().st_size for entry in self._entries() for f in os.scandir(entry))
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], key)
+
+    def _entries(self) -> list[str]:
+        if not os.path.isdir(self.path):
+            return []
+        return [entry.path for prefix in os.scandir(self.path) if prefix.is_dir() and len(prefix.name) == 2
+                for entry in os.scandir(prefix.path)]
+
+
+def resolve(cache: "Cache | bool") -> Cache:
+    """The cache to use for a cache argument, True means the default cache."""
+    global _default
+    if cache is True:
+        if _default is None:
+            _default = Cache()
+        return _default
+    return cache
+
+
+def describe(value) -> dict:
+    """The inputs of a projectile, spec, gun or medium, for hashing into keys."""
+    if isinstance(value, Projectile):
+        state = value.state
+        return {"spec": describe(value.spec),
+                "state": [state.velocity, state.angle, state.angular_velocity]}
+    if isinstance(value, Spec):
+        return {"type": _name(value.kind), "mass": value.mass, "diameter": value.diameter, "i_mod": value.i_mod}
+    if isinstance(value, type):
+        return {"type": _name(value)}
+    return {"type": _name(type(value)), **vars(value)}
+
+
+def _name(kind: type) -> str:
+    return f"{kind.__module__}.{kind.__qualname__}"
+
+
+def _load(path: str) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        # Empty arrays can't be memory mapped
+        return np.load(path)
@@ -0,0 +1,165 @@
+"""Catalogues of projectiles and guns, read from a data file when first used.
+
+The data file holds each section by column: field names to lists with a
+value for every entry. A catalogue reads its section on first use,
+keeps the numeric fields as numpy arrays, and builds an entry only when
+it's looked up. Importing costs nothing, and only the entries used are
+ever built.
+
+Numeric fields can be searched by value or range. Each field is sorted
+on its first search, after which searches are binary searches.
+"""
+import json
+import math
+import os
+from collections.abc import MutableMapping
+from typing import Callable
+from typing import Iterator
+
+import numpy as np
+
+from ballistics.guns import SimpleGun
+from ballistics.projectiles import GolfBall
+from ballistics.projectiles import Sphere
+
+PATH = os.path.join(os.path.dirname(__file__), "catalogue.json")
+
+
+class Catalogue(MutableMapping):
+    """Entries of a section of a data file by name, built on first access.
+
+    Works like a dictionary of names to entries. Entries can be added,
+    replaced and removed, the data file isn't changed.
+    """
+
+    def __init__(self, path: str, section: str, build: Callable[[dict], object],
+                 fields: dict[str, Callable[[object], float]]):
+        """
+        path - JSON data file
+
+        section - the section of the data file with the entries
+
+        build - makes an entry from a dictionary of its fields
+
+        fields - numeric fields that can be searched, to functions that
+        read them from an entry added later
+        """
+        self.path = path
+        self.section = section
+        self.build = build
+        self.fields = fields
+        self._names = None
+        self._columns = None
+        # Row of every name in the data file, entries built so far, and entries added or replaced since
+        self._rows = None
+        self._built = {}
+        self._added = {}
+        self._removed = set()
+        self._sorted = {}
+
+    def _load(self):
+        if self._rows is not None:
+            return
+        with open(self.path) as f:
+            columns = json.load(f)[self.section]
+        self._names = columns.pop("name")
+        self._columns = {name: np.array(values, dtype=float) if all(isinstance(v, (int, float)) for v in values) else values
+                         for name, values in columns.items()}
+        self._rows = {name: row for row, name in enumerate(self._names)}
+
+    def __getitem__(self, name: str):
+        if name in self._added:
+            return self._added[name]
+        if name not in self._built:
+            self._load()
+            if name in self._removed or name not in self._rows:
+                raise KeyError(name)
+            row = self._rows[name]
+            self._built[name] = self.build({field: values[row].item() if isinstance(values, np.ndarray) else values[row]
+                                            for field, values in self._columns.items()})
+        return self._built[name]
+
+    def __setitem__(self, name: str, entry):
+        self._added[name] = entry
+        self._removed.discard(name)
+
+    def __delitem__(self, name: str):
+        if name not in self:
+            raise KeyError(name)
+        self._load()
+        self._added.pop(name, None)
+        self._built.pop(name, None)
+        if name in self._rows:
+            self._removed.add(name)
+
+    def __contains__(self, name) -> bool:
+        if name in self._added:
+            return True
+        self._load()
+        return name in self._rows and name not in self._removed
+
+    def __iter__(self) -> Iterator[str]:
+        self._load()
+        for name in self._names:
+            if name not in self._removed and name not in self._added:
+                yield name
+        yield from self._added
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._names) + sum(name not in self._rows for name in self._added) - len(self._removed)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.path!r}, {self.section!r})"
+
+    def find(self, **ranges: "float | tuple[float | None, float | None]") -> list[str]:
+        """Names of the entries whose fields are in every one of the ranges.
+
+        A range is a (low, high) pair, both included and None for no
+        bound, or a single value to match exactly. For example
+        find(diameter=.00595, mass=(.0002, .0003)).
+        """
+        self._load()
+        rows = None
+        for field, bounds in ranges.items():
+            if field not in self.fields:
+                raise ValueError(f"{field} isn't searchable, pick from {', '.join(self.fields)}")
+            low, high = bounds if isinstance(bounds, tuple) else (bounds, bounds)
+            order, values = self._index(field)
+            start = 0 if low is None else np.searchsorted(values, low, "left")
+            stop = len(values) if high is None else np.searchsorted(values, high, "right")
+            found = order[start:stop]
+            rows = found if rows is None else np.intersect1d(rows, found, assume_unique=True)
+        rows = np.arange(len(self._names)) if rows is None else np.sort(rows)
+        names = [self._names[row] for row in rows.tolist()]
+        names = [name for name in names if name not in self._removed and name not in self._added]
+        return names + [name for name, entry in self._added.items() if _within(entry, self.fields, ranges)]
+
+    def _index(self, field: str) -> tuple[np.ndarray, np.ndarray]:
+        """Rows sorted by a field, and the field's values in that order."""
+        if field not in self._sorted:
+            order = np.argsort(self._columns[field], kind="stable")
+            self._sorted[field] = (order, self._columns[field][order])
+        return self._sorted[field]
+
+
+def _within(entry, fields: dict[str, Callable[[object], float]], ranges: dict) -> bool:
+    for field, bounds in ranges.items():
+        low, high = bounds if isinstance(bounds, tuple) else (bounds, bounds)
+        value = fields[field](entry)
+        if not (-math.inf if low is None else low) <= value <= (math.inf if high is None else high):
+            return False
+    return True
+
+
+PROJECTILE_KINDS = {"Sphere": Sphere, "GolfBall": GolfBall}
+GUN_KINDS = {"SimpleGun": SimpleGun}
+
+# Masses in kg, diameters in m
+projectiles = Catalogue(PATH, "projectiles",
+                        lambda f: PROJECTILE_KINDS[f["kind"]](f["mass"], f["diameter"], f["i_mod"]),
+                        {"mass": lambda p: p.mass, "diameter": lambda p: p.diameter})
+# Linear and angular kinetic energies in J, angles in rad
+guns = Catalogue(PATH, "guns",
+                 lambda f: GUN_KINDS[f["kind"]](f["energy"], f["spin_energy"], f["angle"]),
+                 {"energy": lambda g: g.energy})
@@ -0,0 +1,269 @@
+"""Monte Carlo dispersion, how shot-to-shot variation spreads shots downrange.
+
+Shots are sampled from normal distributions around a nominal projectile
+and gun, simulated in batches, and where each one crosses the chosen
+distances is fed to streaming accumulators. Only the accumulators are
+kept, so memory stays the same no matter how many shots are run. Batches
+are seeded from the seed and their number, so results don't depend on
+how they're spread over processes.
+"""
+import collections
+import concurrent.futures
+import math
+import os
+
+import numpy as np
+
+from ballistics.extras import analytic
+from ballistics.extras import batch
+from ballistics.guns import Gun
+from ballistics.mediums import Medium
+from ballistics.projectiles import Projectile
+
+# Quantities recorded at each distance, and the histogram bin width used for their percentiles
+QUANTITIES = {"drop": 0.0001, "time": 0.00001, "velocity": 0.001}
+
+
+class Accumulator:
+    """Streaming count, mean, variance, extremes and percentiles of a quantity.
+
+    The mean and variance are kept with Welford's method, merged a batch
+    at a time. Percentiles come from a sparse histogram of fixed width
+    bins, so they're accurate to the bin width. Accumulators of separate
+    runs can be merged.
+    """
+
+    def __init__(self, resolution: float):
+        """resolution - histogram bin width"""
+        self.resolution = resolution
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.bins = collections.Counter()
+
+    def add(self, values: np.ndarray):
+        """Add values, NaN values are skipped."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        mean = float(values.mean())
+        self._combine(len(values), mean, float(((values - mean)**2).sum()), values.min(), values.max())
+        bins, counts = np.unique(np.floor(values / self.resolution).astype(np.int64), return_counts=True)
+        self.bins.update(dict(zip(bins.tolist(), counts.tolist())))
+
+    def merge(self, other: "Accumulator"):
+        """Add everything another accumulator with the same resolution has seen."""
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+            self.bins.update(other.bins)
+
+    def _combine(self, count: int, mean: float, m2: float, low: float, high: float):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta**2 * self.count * count / total
+        self.count = total
+        self.min = min(self.min, float(low))
+        self.max = max(self.max, float(high))
+
+    @property
+    def variance(self) -> float:
+        """Sample variance."""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation."""
+        return self.variance**.5
+
+    @property
+    def spread(self) -> float:
+        """Extreme spread, the largest minus the smallest value."""
+        return self.max - self.min if self.count else math.nan
+
+    def percentile(self, q: float) -> float:
+        """The value q percent of values are below, interpolated within a bin."""
+        if not self.count:
+            return math.nan
+        rank = q / 100 * self.count
+        seen = 0
+        for index in sorted(self.bins):
+            count = self.bins[index]
+            if seen + count >= rank:
+                value = (index + (rank - seen) / count) * self.resolution
+                return min(max(value, self.min), self.max)
+            seen += count
+        return self.max
+
+    def summary(self, percentiles=(5, 50, 95)) -> dict[str, float]:
+        """Count, mean, std, min, max, spread and the percentiles by name."""
+        return {"count": self.count, "mean": self.mean, "std": self.std, "min": self.min, "max": self.max,
+                "spread": self.spread, **{f"p{q:g}": self.percentile(q) for q in percentiles}}
+
+
+class Dispersion:
+    """Accumulated crossings of many shots at a few downrange distances."""
+
+    def __init__(self, dists: list[float]):
+        """dists - distances in m shots are recorded at"""
+        self.dists = sorted(dists)
+        self.shots = 0
+        # Shots that dropped or ran out of time before each distance
+        self.missed = [0] * len(self.dists)
+        self.stats = {name: [Accumulator(resolution) for _ in self.dists] for name, resolution in QUANTITIES.items()}
+
+    def add(self, crossings: dict[str, np.ndarray]):
+        """Add the crossings of a batch, arrays of shape (shots, dists) with NaN for misses."""
+        drops = crossings["drop"]
+        self.shots += len(drops)
+        for j in range(len(self.dists)):
+            self.missed[j] += int(np.isnan(drops[:, j]).sum())
+            for name, stats in self.stats.items():
+                stats[j].add(crossings[name][:, j])
+
+    def merge(self, other: "Dispersion"):
+        """Add the shots of another dispersion at the same distances."""
+        self.shots += other.shots
+        self.missed = [a + b for a, b in zip(self.missed, other.missed)]
+        for name, stats in self.stats.items():
+            for mine, theirs in zip(stats, other.stats[name]):
+                mine.merge(theirs)
+
+    def group(self, dist: float) -> float:
+        """Extreme vertical spread in m at one of the distances."""
+        return self.stats["drop"][self.dists.index(dist)].spread
+
+    def summary(self, percentiles=(5, 50, 95)) -> list[dict]:
+        """Statistics of every quantity at every distance."""
+        return [{"dist": dist, "missed": self.missed[j],
+                 **{name: stats[j].summary(percentiles) for name, stats in self.stats.items()}}
+                for j, dist in enumerate(self.dists)]
+
+
+def disperse(projectile: Projectile, gun: Gun, medium: Medium, dists: list[float], shots: int, seed=0,
+             mass_sd=0.0, diameter_sd=0.0, energy_sd=0.0, spin_sd=0.0, angle_sd=0.0, drop=10.0,
+             time_step=0.001, max_time=60.0, batch_size=10000, workers=1) -> Dispersion:
+    """Simulate shots with normally distributed variations and accumulate where they cross the distances.
+
+    projectile - nominal projectile
+
+    gun - nominal gun, its velocity, spin and angle for the projectile
+
+    medium - to be used
+
+    dists - distances in m to record drop, time and velocity at
+
+    shots - number of shots
+
+    seed - seed of the random numbers, the same seed gives the same shots
+
+    mass_sd - standard deviation of the mass in kg
+
+    diameter_sd - standard deviation of the diameter in m
+
+    energy_sd - standard deviation of the muzzle energy in J
+
+    spin_sd - standard deviation of the spin in rad/s
+
+    angle_sd - standard deviation of the launch angle in rad
+
+    drop - a shot ends once its drop is below -drop
+
+    time_step - time step at which to evaluate physics
+
+    max_time - a shot ends after this long
+
+    batch_size - shots simulated together
+
+    workers - number of processes, None for the number of CPUs
+    """
+    nominal = (projectile.spec, gun.vel(projectile), gun.spin(projectile), gun.angle)
+    spreads = (mass_sd, diameter_sd, energy_sd, spin_sd, angle_sd)
+    settings = (medium, sorted(dists), drop, time_step, max_time)
+    batches = [(i, min(batch_size, shots - i * batch_size)) for i in range(math.ceil(shots / batch_size))]
+    result = Dispersion(dists)
+    # Batches are merged in order, so the result is the same for any number of workers
+    if workers == 1:
+        for index, size in batches:
+            result.merge(_run(nominal, spreads, settings, seed, index, size))
+        return result
+    workers = min(workers or os.cpu_count(), len(batches))
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        count = len(batches)
+        for part in pool.map(_run, [nominal] * count, [spreads] * count, [settings] * count, [seed] * count,
+                             *zip(*batches)):
+            result.merge(part)
+    return result
+
+
+def sample(nominal: tuple, spreads: tuple, seed: int, index: int, size: int) -> "batch.SphereBatch":
+    """The shots of one batch, each batch number always gets the same shots."""
+    spec, velocity, spin, angle = nominal
+    mass_sd, diameter_sd, energy_sd, spin_sd, angle_sd = spreads
+    rng = np.random.default_rng([seed, index])
+    mass = rng.normal(spec.mass, mass_sd, size)
+    diameter = rng.normal(spec.diameter, diameter_sd, size)
+    energy = np.maximum(rng.normal(spec.mass * velocity**2 / 2, energy_sd, size), 0)
+    spins = rng.normal(spin, spin_sd, size)
+    angles = rng.normal(angle, angle_sd, size)
+    return batch.batch_types[spec.kind](mass, diameter, spec.i_mod, (2 * energy / mass)**.5, spins, angles)
+
+
+def crossings(projectiles: "batch.SphereBatch", medium: Medium, dists: list[float], drop: float,
+              time_step=0.001, max_time=60.0) -> dict[str, np.ndarray]:
+    """Drop, time and velocity of every shot where it crosses the sorted distances.
+
+    Returns arrays of shape (shots, dists), NaN where a shot dropped below
+    -drop or ran out of time first. Crossings are interpolated between
+    time steps.
+    """
+    dists = np.asarray(dists, dtype=float)
+    n, m = len(projectiles), len(dists)
+    if analytic.drag_free(medium):
+        path = analytic.Parabola(projectiles.velocity[:, None], projectiles.angle[:, None], medium.g)
+        time = path.time_at_dist(dists)
+        _, y = path.position(time)
+        velocity, _ = path.state(time)
+        reached = (time <= path.time_at_drop(drop)) & (time <= max_time)
+        return {name: np.where(reached, values, math.nan) for name, values in (("drop", y), ("time", time), ("velocity", velocity))}
+
+    results = {name: np.full((n, m), math.nan) for name in QUANTITIES}
+    # Indices of the shots still in flight, and the next distance each one has to cross
+    active = np.arange(n)
+    upcoming = np.zeros(n, dtype=int)
+    x = np.zeros(n)
+    y = np.zeros(n)
+    time = 0
+    while len(active):
+        old_x, old_y, old_velocity = x, y, projectiles.velocity
+        dx, dy = batch.tick(projectiles, medium, time_step)
+        x = x + dx
+        y = y + dy
+        time += time_step
+        while True:
+            target = dists[np.minimum(upcoming, m - 1)]
+            passed = (upcoming < m) & (x >= target)
+            if not passed.any():
+                break
+            f = (target[passed] - old_x[passed]) / (x[passed] - old_x[passed])
+            index, column = active[passed], upcoming[passed]
+            results["drop"][index, column] = old_y[passed] + f * (y[passed] - old_y[passed])
+            results["time"][index, column] = time - time_step * (1 - f)
+            results["velocity"][index, column] = old_velocity[passed] + f * (projectiles.velocity[passed] - old_velocity[passed])
+            upcoming[passed] += 1
+        done = (upcoming >= m) | (y < -drop) | (time >= max_time)
+        if done.any():
+            active, upcoming, x, y = active[~done], upcoming[~done], x[~done], y[~done]
+            projectiles = projectiles.subset(~done)
+    return results
+
+
+def _run(nominal: tuple, spreads: tuple, settings: tuple, seed: int, index: int, size: int) -> Dispersion:
+    """Simulate and accumulate a batch, in a worker process or not."""
+    medium, dists, drop, time_step, max_time = settings
+    result = Dispersion(dists)
+    result.add(crossings(sample(nominal, spreads, seed, index, size), medium, dists, drop, time_step, max_time))
+    return result
@@ -0,0 +1,138 @@
+"""Firing tables, precomputed flights over a grid of launch angles."""
+import copy
+import io
+import math
+
+import numpy as np
+
+from ballistics.extras import config
+from ballistics.extras import ranging
+from ballistics.guns import Gun
+from ballistics.mediums import Medium
+from ballistics.projectiles import Projectile
+
+# Columns stored for every launch angle and distance
+COLUMNS = ("drop", "time", "velocity")
+
+
+class FiringTable:
+    """Drop, time and velocity of a gun/projectile/medium triple by launch angle and distance.
+
+    Both grids are evenly spaced, so a lookup is a bilinear interpolation
+    between the four nearest entries. Entries past where a shot ended are
+    NaN.
+    """
+
+    def __init__(self, angles: np.ndarray, dists: np.ndarray, columns: dict[str, np.ndarray]):
+        """
+        angles - evenly spaced launch angles in rad
+        dists - evenly spaced distances in m, starting at 0
+        columns - COLUMNS names to arrays of shape (angles, dists)
+        """
+        self.angles = np.asarray(angles, dtype=float)
+        self.dists = np.asarray(dists, dtype=float)
+        self.columns = {name: np.asarray(columns[name], dtype=float) for name in COLUMNS}
+
+    @classmethod
+    def build(cls, projectile: Projectile, gun: Gun, medium: Medium, drop: float,
+              angles: np.ndarray | None = None, samples=1000, time_step=0.001,
+              max_time=60.0) -> "FiringTable":
+        """Simulate a shot at every angle and sample each one at the same distances.
+
+        projectile - to be shot
+
+        gun - to shoot the projectile, its angle is ignored
+
+        medium - to be used
+
+        drop - each flight ends once the drop is below -drop
+
+        angles - evenly spaced launch angles in rad, by default -5 to 45
+        degrees every half a degree
+
+        samples - number of distances, up to the farthest shot
+
+        time_step - time step at which to evaluate physics
+
+        max_time - each flight ends after this long even if it didn't drop
+        """
+        if angles is None:
+            angles = np.linspace(-5, 45, 101) * config.DEG_TO_RAD
+        gun = copy.copy(gun)
+        flights = []
+        for angle in angles:
+            gun.angle = angle
+            shot = gun.launch(projectile.spec)
+            flights.append(ranging.sim(shot, medium, lambda r: r["time"][-1] >= max_time, None, time_step,
+                                       "velocity", drop=drop))
+        dists = np.linspace(0, max(f["dist"][-1] for f in flights), samples)
+        columns = {name: np.full((len(angles), samples), math.nan) for name in COLUMNS}
+        for i, flight in enumerate(flights):
+            for name in COLUMNS:
+                columns[name][i] = flight.at_dist(name, dists)
+        return cls(angles, dists, columns)
+
+    def at(self, dist, angle) -> dict[str, np.ndarray]:
+        """Drop, time and velocity at the distances for the launch angles, NaN if out of the table."""
+        dist, angle = np.broadcast_arrays(np.asarray(dist, dtype=float), np.asarray(angle, dtype=float))
+        i, di = _locate(self.angles, angle)
+        j, dj = _locate(self.dists, dist)
+        results = {}
+        for name, values in self.columns.items():
+            low = values[i, j] * (1 - dj) + values[i, j + 1] * dj
+            high = values[i + 1, j] * (1 - dj) + values[i + 1, j + 1] * dj
+            results[name] = low * (1 - di) + high * di
+        return results
+
+    def angle_for(self, x: float, y: float) -> float:
+        """The lowest launch angle in rad that hits the point at distance x and drop y.
+
+        Raises ValueError if no angle in the table reaches it.
+        """
+        j, dj = _locate(self.dists, np.asarray(float(x)))
+        drops = self.columns["drop"][:, j] * (1 - dj) + self.columns["drop"][:, j + 1] * dj
+        reached = np.flatnonzero(~np.isnan(drops))
+        if not len(reached):
+            raise ValueError(f"no shot in the table reaches a distance of {x} m")
+        # Drop at x rises with the angle up to the highest shot, past it the shot lobs over
+        first = reached[0]
+        top = first + int(np.argmax(np.where(np.isnan(drops[first:]), -math.inf, drops[first:])))
+        drops = np.maximum.accumulate(drops[first:top + 1])
+        if not drops[0] <= y <= drops[-1]:
+            raise ValueError(f"no shot in the table hits a drop of {y} m at {x} m")
+        return float(np.interp(y, drops, self.angles[first:top + 1]))
+
+    def to_bytes(self) -> bytes:
+        """The table as an .npz file."""
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, angles=self.angles, dists=self.dists, **self.columns)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "FiringTable":
+        """A table read from to_bytes."""
+        with np.load(io.BytesIO(data)) as f:
+            return cls(f["angles"], f["dists"], {name: f[name] for name in COLUMNS})
+
+    def to_dict(self) -> dict[str, list]:
+        """The table as lists, for JSON. NaN entries are None."""
+        def plain(values: np.ndarray) -> list:
+            return np.where(np.isnan(values), None, values).tolist()
+        return {"angles": self.angles.tolist(), "dists": self.dists.tolist(),
+                **{name: plain(values) for name, values in self.columns.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, list]) -> "FiringTable":
+        """A table read from to_dict."""
+        columns = {name: np.array(data[name], dtype=float) for name in COLUMNS}
+        return cls(data["angles"], data["dists"], columns)
+
+
+def _locate(grid: np.ndarray, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Index of the grid cell each value is in and how far across it, out of range values give NaN."""
+    position = (values - grid[0]) / (grid[1] - grid[0])
+    index = np.clip(np.floor(position), 0, len(grid) - 2).astype(int)
+    fraction = position - index
+    # Outside the grid, make the interpolation NaN
+    fraction = np.where((position < 0) | (position > len(grid) - 1), math.nan, fraction)
+    return index, fraction
@@ -0,0 +1,127 @@
+"""Opt-in counters, timers and traces for simulations.
+
+An Instrument is passed to sim, or used to tick a projectile directly.
+It counts steps, counts and times every force call, counts clamped
+x velocities and spin turning negative, calls per-step callbacks and
+keeps a sampled trace. Flights without one run exactly the same code as
+before, so instrumentation costs nothing when it's off.
+
+Instrumented flights go through Projectile.tick with a proxy of the
+medium, not a fused kernel, so every force call is seen. Flights in
+drag-free mediums are still worked out in closed form, with a gravity
+call counted for every step, but not timed.
+"""
+import collections
+import json
+import time
+from typing import Callable
+from typing import Iterator
+
+from ballistics.mediums import Medium
+from ballistics.projectiles import Projectile
+
+# Medium methods that exert forces
+FORCES = ("drag", "crush", "lift", "gravity", "buoyant", "torque")
+
+
+class InstrumentedMedium:
+    """A medium that counts and times its force calls, everything else is passed through."""
+
+    def __init__(self, medium: Medium, instrument: "Instrument"):
+        self._medium = medium
+        self._instrument = instrument
+        for name in FORCES:
+            setattr(self, name, self._timed(name, getattr(medium, name)))
+
+    def __getattr__(self, name: str):
+        return getattr(self._medium, name)
+
+    def _timed(self, name: str, force: Callable) -> Callable:
+        counts = self._instrument.counts
+        times = self._instrument.times
+
+        def timed(projectile: Projectile) -> float:
+            start = time.perf_counter()
+            value = force(projectile)
+            times[name] += time.perf_counter() - start
+            counts[name] += 1
+            return value
+
+        return timed
+
+
+class Instrument:
+    """Counters, timers, callbacks and a trace for one or more flights."""
+
+    def __init__(self, callbacks: list[Callable] = (), trace_every=0, trace_length=10000):
+        """
+        callbacks - called after every step with the step number, the
+        time and x/y distances of the flight (or of the tick), and the
+        projectile
+
+        trace_every - keep every this many steps in the trace, 0 for none
+
+        trace_length - most recent trace points kept
+        """
+        self.callbacks = list(callbacks)
+        self.trace_every = trace_every
+        self.steps = 0
+        # Force calls and seconds spent in them, by force
+        self.counts = collections.Counter()
+        self.times = collections.Counter()
+        # Steps where tick clamped the x velocity, or the spin turned negative
+        self.clamps = 0
+        self.negative_spin = 0
+        self.trace = collections.deque(maxlen=trace_length)
+
+    def wrap(self, medium: Medium) -> InstrumentedMedium:
+        """A proxy of the medium that reports its force calls to this instrument."""
+        return InstrumentedMedium(medium, self)
+
+    def tick(self, projectile: Projectile, medium: Medium, time=0.0, dist=0.0) -> tuple[float, float]:
+        """Projectile.tick, counted like a step of a flight."""
+        spin = projectile.angular_velocity
+        x, y = projectile.tick(self.wrap(medium), time, dist)
+        self._record(projectile, spin, time or dist / projectile.velocity, x, y)
+        return x, y
+
+    def watch(self, flight: Iterator[tuple], projectile: Projectile, forces: tuple[str, ...] = ()) -> Iterator[tuple]:
+        """Pass through the (time, x, y, stop) points of a flight, recording every step.
+
+        forces - forces to count a call of every step, for flights that
+        work them out without calling the medium
+        """
+        # The first point is the start, the rest come after a step each
+        point = next(flight)
+        while True:
+            spin = projectile.angular_velocity
+            yield point
+            point = next(flight)
+            self.counts.update(forces)
+            self._record(projectile, spin, *point[:3])
+
+    def _record(self, projectile: Projectile, spin: float, time: float, x: float, y: float):
+        self.steps += 1
+        # A clamped x velocity is 1e-12, nothing else gets that small
+        if 0 < projectile.vel_x < 0.000000000002:
+            self.clamps += 1
+        if spin > 0 > projectile.angular_velocity:
+            self.negative_spin += 1
+        if self.trace_every and self.steps % self.trace_every == 0:
+            self.trace.append({"step": self.steps, "time": time, "dist": x, "drop": y,
+                               "velocity": projectile.velocity, "angle": projectile.angle,
+                               "angular_velocity": projectile.angular_velocity})
+        for callback in self.callbacks:
+            callback(self.steps, time, x, y, projectile)
+
+    def summary(self) -> dict:
+        """Step and event counts, and the calls, total and mean seconds of every force."""
+        return {"steps": self.steps, "clamps": self.clamps, "negative_spin": self.negative_spin,
+                "forces": {name: {"calls": self.counts[name], "seconds": self.times[name],
+                                  "mean": self.times[name] / self.counts[name] if self.counts[name] else 0}
+                           for name in FORCES}}
+
+    def export(self, path: str):
+        """Write the summary and the trace to a JSON file."""
+        with open(path, "w") as f:
+            json.dump({"summary": self.summary(), "trace": list(self.trace)}, f, indent=1)
@@ -0,0 +1,187 @@
+"""Time integration schemes for advancing a projectile through a medium."""
+import math
+from typing import Callable
+
+from ballistics.extras import kernels
+from ballistics.mediums import Medium
+from ballistics.projectiles import Projectile
+
+
+class Euler:
+    """Fixed time step, forward Euler integration.
+
+    Gives the same results as Projectile.tick, using a fused kernel for
+    the projectile and medium types when there is one.
+    """
+
+    def __init__(self, time_step: float = 0.001):
+        """time_step - time step at which to evaluate physics"""
+        self.time_step = time_step
+        self.evaluations = 0
+        # Projectile and medium the kernel was compiled for, and the kernel
+        self._compiled = None
+        self._run = None
+
+    def step(self, projectile: Projectile, medium: Medium) -> tuple[float, float, float]:
+        """Advance the projectile one step, return the time and x/y distances."""
+        self.evaluations += 1
+        if self._compiled is None or self._compiled[0] is not projectile or self._compiled[1] is not medium:
+            self._compiled = (projectile, medium)
+            self._run = kernels.compile_step(projectile, medium)
+        if self._run is None:
+            x, y = projectile.tick(medium, self.time_step)
+        else:
+            x, y = kernels.step(projectile, self._run, self.time_step)
+        return self.time_step, x, y
+
+
+# Dormand-Prince 5(4) tableau
+_A = ((),
+      (1 / 5,),
+      (3 / 40, 9 / 40),
+      (44 / 45, -56 / 15, 32 / 9),
+      (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+      (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+      (35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84))
+# 5th order weights are the last row of _A, these are the 5th - 4th order weights
+_E = (71 / 57600, 0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40)
+
+
+class DormandPrince:
+    """Adaptive time step, embedded 5(4) Runge-Kutta integration.
+
+    The step size is picked so the estimated local error of every state
+    component stays below tolerance, relative to the component's size
+    when it's larger than 1.
+    """
+
+    def __init__(self, tolerance: float = 1e-6, time_step: float = 0.001, max_step: float = math.inf):
+        """
+        tolerance - local error tolerance per step
+        time_step - initial time step
+        max_step - largest time step allowed
+        """
+        self.tolerance = tolerance
+        self.time_step = time_step
+        self.max_step = max_step
+        self.evaluations = 0
+        # Start/end states and derivatives of the last step, for dense output
+        self._start = None
+        self._end = None
+        # Projectile velocity, angle and angular velocity at the end of the last step
+        self._synced = None
+
+    def _derivative(self, projectile: Projectile, medium: Medium, state: tuple) -> tuple:
+        _set_state(projectile, state)
+        self.evaluations += 1
+        acc_x, acc_y, acc_w = projectile.acceleration(medium)
+        return projectile.vel_x, projectile.vel_y, acc_x, acc_y, acc_w
+
+    def _attempt(self, projectile: Projectile, medium: Medium, state: tuple, k0: tuple, h: float) -> tuple:
+        """Take one step of size h, return the new state, its derivative and the scaled error."""
+        k = [k0]
+        for a in _A[1:6]:
+            k.append(self._derivative(projectile, medium, _combine(state, h, a, k)))
+        new = _combine(state, h, _A[6], k)
+        k1 = self._derivative(projectile, medium, new)
+        k.append(k1)
+        error = max(abs(e) / max(1, abs(s), abs(n)) for e, s, n in zip(_combine((0,) * 5, h, _E, k), state, new))
+        return new, k1, error / self.tolerance
+
+    def step(self, projectile: Projectile, medium: Medium) -> tuple[float, float, float]:
+        """Advance the projectile one accepted step, return the time and x/y distances."""
+        if self._synced == (projectile.velocity, projectile.angle, projectile.angular_velocity):
+            # Reuse the end of the last step, its derivative is already known
+            end, k0, _ = self._end
+            state = (0.0, 0.0) + end[2:]
+        else:
+            state = _get_state(projectile)
+            k0 = self._derivative(projectile, medium, state)
+        h = min(self.time_step, self.max_step)
+        while True:
+            new, k1, error = self._attempt(projectile, medium, state, k0, h)
+            if error <= 1:
+                break
+            h *= max(.2, .9 * error**-.2)
+        self._start = (state, k0)
+        self._end = (new, k1, h)
+        self.time_step = h * min(5, .9 * error**-.2) if error else h * 5
+        self._sync(projectile, new)
+        return h, new[0], new[1]
+
+    def _sync(self, projectile: Projectile, state: tuple):
+        _set_state(projectile, state)
+        self._synced = (projectile.velocity, projectile.angle, projectile.angular_velocity)
+
+    def interpolate(self, theta: float) -> tuple[float, float]:
+        """Cubic Hermite x/y distances at the fraction theta of the last step."""
+        (s0, k0), (s1, k1, h) = self._start, self._end
+        h00 = 2 * theta**3 - 3 * theta**2 + 1
+        h10 = theta**3 - 2 * theta**2 + theta
+        h01 = -2 * theta**3 + 3 * theta**2
+        h11 = theta**3 - theta**2
+        return tuple(h00 * s0[j] + h10 * h * k0[j] + h01 * s1[j] + h11 * h * k1[j] for j in (0, 1))
+
+    def apex(self) -> float:
+        """Highest y distance reached during the last step."""
+        (s0, k0), (s1, k1, _) = self._start, self._end
+        if k0[1] > 0 > k1[1]:
+            return self.interpolate(golden_max(lambda theta: self.interpolate(theta)[1]))[1]
+        return max(s0[1], s1[1])
+
+    def retake(self, projectile: Projectile, medium: Medium, theta: float) -> tuple[float, float, float]:
+        """Redo the last step so it ends at the fraction theta, return the time and x/y distances."""
+        (state, k0), (_, _, h) = self._start, self._end
+        new, k1, _ = self._attempt(projectile, medium, state, k0, h * theta)
+        self._end = (new, k1, h * theta)
+        self._sync(projectile, new)
+        return h * theta, new[0], new[1]
+
+
+def _get_state(projectile: Projectile) -> tuple:
+    """Relative x/y position, x/y velocity and angular velocity."""
+    return 0.0, 0.0, projectile.vel_x, projectile.vel_y, projectile.angular_velocity
+
+
+def _set_state(projectile: Projectile, state: tuple):
+    _, _, vel_x, vel_y, projectile.angular_velocity = state
+    if vel_x < 0:
+        vel_x = 0.000000000001
+    projectile.velocity = (vel_x**2 + vel_y**2)**0.5
+    projectile.angle = math.atan(vel_y / vel_x)
+
+
+def _combine(state: tuple, h: float, weights: tuple, k: list) -> tuple:
+    """state + h * sum(weights * k), for each state component."""
+    return tuple(s + h * sum(w * ki[j] for w, ki in zip(weights, k) if w) for j, s in enumerate(state))
+
+
+def bisect(f: Callable[[float], float], lo: float = 0, hi: float = 1, tolerance: float = 1e-12) -> float:
+    """Find x in [lo, hi] where f changes sign, f(lo) and f(hi) must differ in sign."""
+    f_lo = f(lo)
+    while hi - lo > tolerance:
+        mid = (lo + hi) / 2
+        f_mid = f(mid)
+        if (f_mid < 0) == (f_lo < 0):
+            lo, f_lo = mid, f_mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+def golden_max(f: Callable[[float], float], lo: float = 0, hi: float = 1, tolerance: float = 1e-9) -> float:
+    """Find x in [lo, hi] where the unimodal f is largest."""
+    r = (5**.5 - 1) / 2
+    a = hi - r * (hi - lo)
+    b = lo + r * (hi - lo)
+    f_a, f_b = f(a), f(b)
+    while hi - lo > tolerance:
+        if f_a > f_b:
+            hi, b, f_b = b, a, f_a
+            a = hi - r * (hi - lo)
+            f_a = f(a)
+        else:
+            lo, a, f_a = a, b, f_b
+            b = lo + r * (hi - lo)
+            f_b = f(b)
+    return (lo + hi) / 2
@@ -0,0 +1,191 @@
+"""Fused step functions for specific projectile and medium types.
+
+A kernel does the same work as Projectile.tick, with the same floating
+point operations in the same order, so it gives exactly the same
+results. It works on plain floats instead of going through the medium's
+force methods and the projectile's properties, keeps the geometry that
+doesn't change during a flight, and takes the sine and cosine of the
+angle once per step. The drag, lift and torque coefficients are the
+ones the projectiles use, from ballistics.projectiles.
+"""
+import math
+from typing import Callable
+
+from ballistics.mediums import Fluid
+from ballistics.mediums import Gas
+from ballistics.mediums import Medium
+from ballistics.mediums import Solid
+from ballistics.projectiles import GolfBall
+from ballistics.projectiles import Projectile
+from ballistics.projectiles import Sphere
+from ballistics.projectiles import golf_ball_cd_crisis
+from ballistics.projectiles import golf_ball_cd_recovery
+from ballistics.projectiles import golf_ball_cl
+from ballistics.projectiles import sphere_cd_laminar
+from ballistics.projectiles import sphere_cd_spun
+from ballistics.projectiles import sphere_cd_turbulent
+from ballistics.projectiles import sphere_cl
+from ballistics.projectiles import sphere_ct
+
+# A step takes the velocity, angle, angular velocity and time step and returns
+# the new velocity, angle and angular velocity, and the x/y distances traveled.
+Step = Callable[[float, float, float, float], tuple[float, float, float, float, float]]
+
+
+def compile_step(projectile: Projectile, medium: Medium) -> Step | None:
+    """Build a fused step function for the projectile in the medium.
+
+    Returns None if there's no kernel for their types, Projectile.tick
+    has to be used then.
+    """
+    kernel = kernels.get((type(projectile), type(medium)))
+    return kernel and kernel(projectile, medium)
+
+
+def step(projectile: Projectile, run: Step, time: float) -> tuple[float, float]:
+    """Progress time with a compiled step, return x/y distances traveled."""
+    projectile.velocity, projectile.angle, projectile.angular_velocity, x, y = run(
+        projectile.velocity, projectile.angle, projectile.angular_velocity, time)
+    return x, y
+
+
+def _sphere_coefficients(projectile: Sphere, medium: Fluid) -> tuple[Callable, Callable, Callable]:
+    """Sphere.cd, cl and ct as functions of velocity and angular velocity."""
+    density = medium.density
+    viscosity = medium.viscosity
+    diameter = projectile.diameter
+    rew_k = density * diameter / 2
+
+    def cd(velocity: float, angular_velocity: float) -> float:
+        re = density * velocity * diameter / viscosity
+        if re < 9000:
+            cd0 = sphere_cd_laminar(re)
+        else:
+            cd0 = sphere_cd_turbulent(re)
+        if angular_velocity > 0:
+            cd0 = sphere_cd_spun(cd0, angular_velocity * diameter / 2 / velocity)
+        return cd0
+
+    def cl(velocity: float, angular_velocity: float) -> float:
+        vu = angular_velocity * diameter / 2 / velocity
+        if vu == 0:
+            return 0
+        return sphere_cl(vu)
+
+    def ct(angular_velocity: float) -> float:
+        rew = rew_k * abs(angular_velocity * diameter / 2) / viscosity
+        if rew > 0:
+            return sphere_ct(rew)
+        return 0
+
+    return cd, cl, ct
+
+
+def _golf_ball_coefficients(projectile: GolfBall, medium: Fluid) -> tuple[Callable, Callable, Callable]:
+    """GolfBall.cd, cl and ct as functions of velocity and angular velocity."""
+    density = medium.density
+    viscosity = medium.viscosity
+    diameter = projectile.diameter
+    rew_k = density * diameter / 2
+
+    def cd(velocity: float, angular_velocity: float) -> float:
+        re = density * velocity * diameter / viscosity
+        if re < 9000:
+            return sphere_cd_laminar(re)
+        elif re < 50000:
+            return .5
+        elif re < 100000:
+            return golf_ball_cd_crisis(re)
+        elif re < 200000:
+            return golf_ball_cd_recovery(re)
+        return .4
+
+    def cl(velocity: float, angular_velocity: float) -> float:
+        vu = angular_velocity * diameter / 2 / velocity
+        if vu > .3:
+            return .3
+        if vu == 0:
+            return 0
+        return golf_ball_cl(vu)
+
+    def ct(angular_velocity: float) -> float:
+        rew = rew_k * abs(angular_velocity * diameter / 2) / viscosity
+        return sphere_ct(rew)
+
+    return cd, cl, ct
+
+
+def _fluid_kernel(coefficients: Callable) -> Callable[[Sphere, Fluid], Step]:
+    """Kernel factory for a sphere in a Fluid or Gas."""
+
+    def build(projectile: Sphere, medium: Fluid) -> Step:
+        cd, cl, ct = coefficients(projectile, medium)
+        density = medium.density
+        density_area = density * projectile.area
+        area = projectile.area
+        mass = projectile.mass
+        diameter_cubed = projectile.diameter**3
+        diameter = projectile.diameter
+        gravity = medium.g * mass
+        buoyant = density * projectile.volume * medium.g
+        mofinertia = projectile.mofinertia
+
+        def run(velocity: float, angle: float, angular_velocity: float, time: float) -> tuple:
+            dist = time * velocity
+            cos = math.cos(angle)
+            sin = math.sin(angle)
+
+            force_dir = -(density_area * velocity**2 * cd(velocity, angular_velocity) / 2)
+            force_perp = cl(velocity, angular_velocity) * density * velocity**2 * area / 2
+            force_y = -gravity
+            force_y += buoyant
+
+            vel_x = cos * velocity + (force_dir * cos + force_perp * sin) / mass * time
+            vel_y = sin * velocity + (force_y + force_dir * sin + force_perp * cos) / mass * time
+            if vel_x < 0:
+                vel_x = 0.000000000001
+
+            if angular_velocity != 0:
+                w = angular_velocity * diameter / 2
+                torque = .5 * ct(angular_velocity) * density * diameter_cubed * w**2
+                angular_velocity += -torque / mofinertia * time
+            return (vel_x**2 + vel_y**2)**0.5, math.atan(vel_y / vel_x), angular_velocity, dist * cos, dist * sin
+
+        return run
+
+    return build
+
+
+def _medium_kernel(projectile: Projectile, medium: Medium) -> Step:
+    """Kernel for a Medium or Solid, with no drag, lift, buoyancy or torque."""
+    mass = projectile.mass
+    gravity = medium.g * mass
+    crush = medium.crush(projectile)
+
+    def run(velocity: float, angle: float, angular_velocity: float, time: float) -> tuple:
+        dist = time * velocity
+        cos = math.cos(angle)
+        sin = math.sin(angle)
+
+        force_dir = -0
+        force_dir -= crush
+        force_y = -gravity
+        force_y += 0
+
+        vel_x = cos * velocity + (force_dir * cos + 0 * sin) / mass * time
+        vel_y = sin * velocity + (force_y + force_dir * sin + 0 * cos) / mass * time
+        if vel_x < 0:
+            vel_x = 0.000000000001
+        return (vel_x**2 + vel_y**2)**0.5, math.atan(vel_y / vel_x), angular_velocity, dist * cos, dist * sin
+
+    return run
+
+
+# (projectile type, medium type) to kernel factory
+kernels = {}
+for _medium in (Fluid, Gas):
+    kernels[Sphere, _medium] = _fluid_kernel(_sphere_coefficients)
+    kernels[GolfBall, _medium] = _fluid_kernel(_golf_ball_coefficients)
+for _medium in (Medium, Solid):
+    for _projectile in (Sphere, GolfBall):
+        kernels[_projectile, _medium] = _medium_kernel
@@ -1,22 +1,80 @@
+"""Plots of simulated flights.
+
+Curves are downsampled to a fixed number of points before they're drawn,
+and many of them are drawn together as one collection. matplotlib is only
+imported once something is drawn.
+"""
 import copy
-from matplotlib import pyplot
+
+import numpy as np
 
 from ballistics.guns import Gun
 from ballistics.mediums import Medium
 from ballistics.projectiles import Projectile
 from ballistics.extras import ranging
 
-def plot_bb(projectile: Projectile, gun: Gun, medium: Medium, zero_dist: float, target_dist: float, height: float, target_height: float, projectile_name: str, gun_name: str, x_unit: float, y_units: list[float], x_label: str, y_labels: list[str], rise: float):
-    projectile = copy.deepcopy(projectile)
-    gun = copy.deepcopy(gun)
+# Points kept of every curve, a few per pixel of a typical plot
+POINTS = 2000
+
+def plot_bb(projectile: Projectile, gun: Gun, medium: Medium, zero_dist: float, target_dist: float, height: float, target_height: float, projectile_name: str, gun_name: str, x_unit: float, y_units: list[float], x_label: str, y_labels: list[str], rise: float, axes=None, points=POINTS):
+    gun = copy.copy(gun)
     gun.set_spin(ranging.get_spin(projectile, gun, medium, height, rise, .0001), projectile)
-    plot_bullet(projectile, gun, medium, zero_dist, target_dist, height, target_height, projectile_name, gun_name, x_unit, y_units, x_label, y_labels)
+    plot_bullet(projectile, gun, medium, zero_dist, target_dist, height, target_height, projectile_name, gun_name, x_unit, y_units, x_label, y_labels, axes, points)
 
-def plot_bullet(projectile: Projectile, gun: Gun, medium: Medium, zero_dist: float, target_dist: float, height: float, target_height: float, projectile_name: str, gun_name: str, x_unit: float, y_units: list[float], x_label: str, y_labels: list[str]):
-    projectile = copy.deepcopy(projectile)
-    gun = copy.deepcopy(gun)
+def plot_bullet(projectile: Projectile, gun: Gun, medium: Medium, zero_dist: float, target_dist: float, height: float, target_height: float, projectile_name: str, gun_name: str, x_unit: float, y_units: list[float], x_label: str, y_labels: list[str], axes=None, points=POINTS):
+    draw(bullet_curves(projectile, gun, medium, zero_dist, target_dist, height, target_height, projectile_name, gun_name, x_unit, y_units, x_label, y_labels, points), axes)
+
+def bullet_curves(projectile: Projectile, gun: Gun, medium: Medium, zero_dist: float, target_dist: float, height: float, target_height: float, projectile_name: str, gun_name: str, x_unit: float, y_units: list[float], x_label: str, y_labels: list[str], points=POINTS) -> list[tuple[np.ndarray, np.ndarray, str]]:
+    """The downsampled (x, y, label) curves plot_bullet draws, to draw many of them at once with draw."""
+    gun = copy.copy(gun)
     gun.aim(target_dist, target_height - height)
-    gun.shoot(projectile)
+    projectile = gun.launch(projectile.spec)
     r = ranging.sim(projectile, medium, lambda r: r["drop"][-1] < -height, lambda _: False, .0001, x_label, *y_labels)
-    for y_label, y_unit in tuple(zip(y_labels, y_units)):
-        pyplot.plot([x * x_unit for x in r[x_label]], [y * y_unit for y in r[y_label]], label = gun_name + " " + projectile_name + " " + y_label)
+    x = np.array(r[x_label], dtype=float) * x_unit
+    return [(*downsample(x, np.array(r[y_label], dtype=float) * y_unit, points), gun_name + " " + projectile_name + " " + y_label)
+            for y_label, y_unit in zip(y_labels, y_units)]
+
+def draw(curves: list[tuple[np.ndarray, np.ndarray, str]], axes=None):
+    """Draw (x, y, label) curves as one LineCollection, on the current axes by default.
+
+    Each curve gets the next color of the axes and an entry in its
+    legend, as if it had been plotted by itself.
+    """
+    from matplotlib import pyplot
+    from matplotlib.collections import LineCollection
+
+    axes = axes or pyplot.gca()
+    # Empty lines take the colors from the axes' cycle and carry the labels to the legend
+    colors = [axes.plot([], [], label=label)[0].get_color() for _, _, label in curves]
+    collection = LineCollection([np.column_stack((x, y)) for x, y, _ in curves], colors=colors)
+    axes.add_collection(collection)
+    axes.autoscale_view()
+    return collection
+
+def downsample(x: np.ndarray, y: np.ndarray, points=POINTS) -> tuple[np.ndarray, np.ndarray]:
+    """Largest-triangle-three-buckets downsampling of a curve to the number of points.
+
+    The first and last points are kept. The points in between are split
+    into buckets, and from each one the point kept is the one making the
+    largest triangle with the point kept before it and the average of the
+    next bucket, which keeps the peaks and shape of the curve.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= points or points < 3:
+        return x, y
+    # Bucket k is edges[k] to edges[k + 1], every one has at least a point
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    counts = np.diff(edges)
+    next_x = np.append(np.add.reduceat(x[:edges[-1]], edges[:-1])[1:] / counts[1:], x[-1])
+    next_y = np.append(np.add.reduceat(y[:edges[-1]], edges[:-1])[1:] / counts[1:], y[-1])
+    keep = np.empty(points, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    kept = 0
+    for k in range(points - 2):
+        low, high = edges[k], edges[k + 1]
+        area = np.abs((x[kept] - next_x[k]) * (y[low:high] - y[kept]) - (x[kept] - x[low:high]) * (next_y[k] - y[kept]))
+        kept = low + int(np.argmax(area))
+        keep[k + 1] = kept
+    return x[keep], y[keep]
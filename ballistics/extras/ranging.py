@@ -1,21 +1,39 @@
+import array
 import copy
-import inspect
+import itertools
+import math
 from typing import Callable
+from typing import Iterator
+from typing import NamedTuple
 
+import numpy as np
+
+from ballistics.extras import analytic
+from ballistics.extras import batch
+from ballistics.extras import caching
 from ballistics.extras import config
+from ballistics.extras import instrumentation
+from ballistics.extras import integrators
+from ballistics.extras import trajectory
 from ballistics.guns import Gun
 from ballistics.mediums import Medium
+from ballistics.projectiles import FlightState
 from ballistics.projectiles import Projectile
 
 
 def sim(projectile: Projectile, medium: Medium, condition_t: Callable | None = None, 
         condition_f: Callable | None = None, time_step=0.001, 
-        *args: str) -> dict[str, list[float]]:
+        *args: str, drop: float | None = None, rise: float | None = None,
+        tolerance: float | None = None, cache: "caching.Cache | bool" = False,
+        instrument: "instrumentation.Instrument | None" = None,
+        start: "Checkpoint | None" = None) -> "trajectory.Trajectory":
     """Simulate the flight of a projectile in a medium until stop.
     
-    Returns a dictionary of projectile properties to list of values, as 
+    Returns a trajectory of projectile properties to list of values, as 
     specified in the args. By default results will include the 
-    distance (x), drop (y), and time.
+    distance (x), drop (y), and time. The trajectory is empty if the 
+    flight was stopped with no results. Otherwise it's a Resumable one 
+    that can be extended from where it stopped.
     
     projectile - to be simulated
 
@@ -25,69 +43,686 @@ def sim(projectile: Projectile, medium: Medium, condition_t: Callable | None = N
 
     condition_f - condition to exit and return no results
 
-    time_step - time step at which to evaluate physics
+    time_step - time step at which to evaluate physics, or the initial 
+    time step with a tolerance
 
     args - projectile properties to record at each time step
+
+    drop - exit and return the results once the drop is below -drop
+
+    rise - exit and return no results once the drop is above rise
+
+    tolerance - use adaptive time steps with this local error tolerance 
+    instead of fixed ones. The drop and rise thresholds are then found 
+    exactly, and the last step ends where the drop crosses -drop.
+
+    In a medium with gravity as the only force (see analytic.drag_free) 
+    the flight is a parabola. It's computed exactly instead of stepped, 
+    at every time step, or only at the start and end with a tolerance. 
+    The last point is then where the drop crosses -drop (or rise).
+
+    cache - look the results up in a Cache first and store them there 
+    after, True uses the default cache. Only flights without condition 
+    functions are cached. A cached flight extended with a tolerance 
+    starts again from the initial time step, so its new points can 
+    differ from those of the original flight by up to the tolerance.
+
+    instrument - an Instrument to count, time and trace the flight with
+
+    start - a Checkpoint of an earlier flight to start from instead of 
+    the launch, the projectile's state is set to the checkpoint's. The 
+    time step and tolerance are then those of the earlier flight.
     """
-    time = 0
-    results = {"dist":[0.0], "drop":[0.0], "time":[0.0]}
-    params = [arg for arg in args if arg not in results]
-    for arg in params:
-        if callable(getattr(projectile, arg)):
-            if len(inspect.signature(getattr(projectile, arg)).parameters) > 0:
-                results[arg] = [getattr(projectile, arg)(medium)]
-            else:
-                results[arg] = [getattr(projectile, arg)()]
+    if cache and instrument is None and start is None and condition_t is None and condition_f is None:
+        store = caching.resolve(cache)
+        key = store.key("sim", projectile=projectile, medium=medium, time_step=time_step, args=args, 
+                        drop=drop, rise=rise, tolerance=tolerance)
+        hit = store.get(key)
+        if hit is not None:
+            columns, projectile.state = hit
+            if not columns:
+                return trajectory.Trajectory()
+            # Copied out of the memory mapped arrays, so results can be changed like those of any flight
+            results = Resumable.wrap({name: array.array("d", np.asarray(values, dtype=float).tobytes())
+                                      for name, values in columns.items()})
+            plan = [(results[arg].append, trajectory.reader(projectile, medium, arg))
+                    for arg in dict.fromkeys(args) if arg not in ("dist", "drop", "time")]
+            results._start(projectile, medium, plan, time_step, tolerance, None, _integrator(time_step, tolerance))
+            # With no conditions, only the drop stops a flight with results
+            results.landed = True
+            return results
+        results = sim(projectile, medium, None, None, time_step, *args, drop=drop, rise=rise, tolerance=tolerance)
+        store.put(key, results, projectile.state)
+        return results
+
+    if start is None:
+        start = Checkpoint(1, 0, 0.0, 0.0, projectile.state, _integrator(time_step, tolerance))
+    else:
+        projectile.state = start.state
+        start = start._replace(integrator=copy.copy(start.integrator))
+        time_step = start.integrator.time_step
+        tolerance = start.integrator.tolerance if isinstance(start.integrator, integrators.DormandPrince) else None
+    results = Resumable({"dist": [start.dist], "drop": [start.drop], "time": [start.time]})
+    results._start(projectile, medium, _plan(results, projectile, medium, args), time_step, tolerance, 
+                   instrument, start.integrator)
+    if results.extend_until(condition_t, condition_f, drop, rise):
+        return results
+    return trajectory.Trajectory()
+
+
+class Checkpoint(NamedTuple):
+    """A point of a flight and everything needed to continue it from there.
+
+    Checkpoints can be kept and used as the start of any number of later 
+    flights, see Resumable.checkpoint and sim.
+    """
+    # Number of points of the trajectory up to and including this one
+    steps: int
+    time: float
+    dist: float
+    drop: float
+    state: FlightState
+    # The integrator's state, Euler or DormandPrince
+    integrator: object
+
+
+class Resumable(trajectory.Trajectory):
+    """A simulated trajectory that can be extended from where it stopped.
+
+    Holds the projectile, medium and integrator of its flight, so 
+    extending it continues the same steps instead of starting over. A 
+    flight extended with fixed time steps gets exactly the points a 
+    single flight to the later condition would have had. In drag-free 
+    mediums, where a flight ends exactly where it crosses the drop or 
+    rise, it also keeps that crossing point, and its other points are on 
+    the same time grid as the single flight's, equal up to rounding.
+
+    landed is True if the flight last stopped because its drop fell 
+    below -drop, rather than on a condition or the rise.
+    """
+
+    def _start(self, projectile: Projectile, medium: Medium, plan: list[tuple[Callable, Callable]], 
+               time_step: float, tolerance: float | None, instrument: "instrumentation.Instrument | None", 
+               integrator: object):
+        self._projectile = projectile
+        self._medium = medium
+        self._plan = plan
+        self._time_step = time_step
+        self._tolerance = tolerance
+        self._instrument = instrument
+        self._integrator = integrator
+        self._state = projectile.state
+        self.landed = False
+
+    def extend_until(self, condition_t: Callable | None = None, condition_f: Callable | None = None, 
+                     drop: float | None = None, rise: float | None = None) -> bool:
+        """Continue the flight from its last point until stop, see sim.
+
+        The conditions are checked against the whole trajectory, starting 
+        with its last point, so a flight already past the condition isn't 
+        extended. Returns True if it stopped on condition_t or the drop, 
+        False if it stopped on condition_f or the rise, in which case the 
+        points up to there are kept.
+
+        condition_t - condition at which to stop
+
+        condition_f - condition at which to stop with no results
+
+        drop - stop once the drop is below -drop
+
+        rise - stop with no results once the drop is above rise
+        """
+        dists, drops, times = self["dist"], self["drop"], self["time"]
+        projectile, medium, plan = self._projectile, self._medium, self._plan
+        projectile.state = self._state
+        start = Checkpoint(self.steps, times[-1], dists[-1], drops[-1], self._state, self._integrator)
+        if self._instrument is None:
+            flight = _fly(projectile, medium, self._time_step, drop, rise, self._tolerance, start)
+        elif analytic.drag_free(medium):
+            # The closed form doesn't call the medium, gravity is the one force it works out every step
+            flight = self._instrument.watch(_fly(projectile, medium, self._time_step, drop, rise, 
+                                                 self._tolerance, start), projectile, ("gravity",))
         else:
-            results[arg] = [getattr(projectile, arg)]
+            flight = self._instrument.watch(_fly(projectile, self._instrument.wrap(medium), self._time_step, 
+                                                 drop, rise, self._tolerance, start), projectile)
+        _, _, _, stop = next(flight)
+        while True:
+            if stop or condition_t and condition_t(self):
+                self._state = projectile.state
+                self.landed = bool(stop)
+                return True
+            if stop is False or condition_f and condition_f(self):
+                self._state = projectile.state
+                self.landed = False
+                return False
+            time, x, y, stop = next(flight)
+
+            dists.append(x)
+            drops.append(y)
+            times.append(time)
+            for append, read in plan:
+                append(read())
+
+    def checkpoint(self) -> Checkpoint:
+        """The last point of the flight, to restore or start other flights from."""
+        return Checkpoint(self.steps, self["time"][-1], self["dist"][-1], self["drop"][-1], self._state, 
+                          copy.copy(self._integrator))
+
+    def restore(self, checkpoint: Checkpoint):
+        """Go back to an earlier checkpoint of this flight, dropping the points after it."""
+        if not 0 < checkpoint.steps <= self.steps or self["time"][checkpoint.steps - 1] != checkpoint.time:
+            raise ValueError("the checkpoint isn't a point of this trajectory")
+        for column in self.values():
+            del column[checkpoint.steps:]
+        self._state = checkpoint.state
+        self._integrator = copy.copy(checkpoint.integrator)
+
+
+def iter_sim(projectile: Projectile, medium: Medium, condition_t: Callable | None = None, 
+             condition_f: Callable | None = None, time_step=0.001, 
+             *args: str, drop: float | None = None, rise: float | None = None,
+             tolerance: float | None = None, every_time: float | None = None, 
+             every_dist: float | None = None, history=2, 
+             final_only=False) -> Iterator[dict[str, float]]:
+    """Simulate the flight of a projectile in a medium, yielding states as they're produced.
+
+    Works like sim, but only the last few points are kept for the 
+    conditions, so memory use stays the same no matter how long the 
+    flight is. Yields a dictionary of projectile properties to values for 
+    the first point, every point picked by every_time and every_dist, and 
+    the final point if the flight ends with results. If the flight ends 
+    with no results, the final point isn't yielded.
+
+    every_time - only yield points at least this much time apart
+
+    every_dist - only yield points at least this far apart
 
+    history - number of recent points the conditions can look back at
+
+    final_only - only yield the final point
+
+    The other arguments are the same as for sim.
+    """
+    window = trajectory.Window({"dist": [0.0], "drop": [0.0], "time": [0]}, history)
+    dists, drops, times = window["dist"], window["drop"], window["time"]
+    plan = _plan(window, projectile, medium, args)
+    every = every_time is None and every_dist is None
+    last_time = last_dist = -math.inf
+
+    flight = _fly(projectile, medium, time_step, drop, rise, tolerance)
+    time, x, _, stop = next(flight)
     while True:
-        if condition_t and condition_t(results):
-            return results
-        if condition_f and condition_f(results):
-            return {}
-        x, y = projectile.tick(medium, time_step)
+        if stop or condition_t and condition_t(window):
+            yield {name: column[-1] for name, column in window.items()}
+            return
+        if stop is False or condition_f and condition_f(window):
+            return
+        if not final_only and (every 
+                               or every_time is not None and time - last_time >= every_time * (1 - 1e-9) 
+                               or every_dist is not None and x - last_dist >= every_dist * (1 - 1e-9)):
+            last_time, last_dist = time, x
+            yield {name: column[-1] for name, column in window.items()}
+        time, x, y, stop = next(flight)
+
+        dists.append(x)
+        drops.append(y)
+        times.append(time)
+        for append, read in plan:
+            append(read())
+
+
+def _plan(results: "trajectory.Trajectory", projectile: Projectile, medium: Medium, args: tuple[str]) -> list[tuple[Callable, Callable]]:
+    """Add the initial values of the properties to record to the results.
+
+    Returns (append to column, read property) pairs. How to read each 
+    property is worked out once, not on every step.
+    """
+    plan = []
+    for arg in args:
+        if arg not in results:
+            read = trajectory.reader(projectile, medium, arg)
+            results[arg] = [read()]
+            plan.append((results[arg].append, read))
+    return plan
+
+
+def _fly(projectile: Projectile, medium: Medium, time_step: float, drop: float | None, rise: float | None, 
+         tolerance: float | None, start: Checkpoint | None = None) -> Iterator[tuple[float, float, float, bool | None]]:
+    """Step the projectile through the medium.
+
+    Yields the time, dist and drop at the start and after each step, and 
+    whether a threshold stops the flight there: True if the drop is 
+    below -drop, False if it rose above rise, or None.
+
+    start - continue from this point with its integrator, which is 
+    stepped on, instead of from the launch with a new one
+    """
+    if analytic.drag_free(medium):
+        yield from _fly_parabola(projectile, medium, time_step, drop, rise, tolerance, start)
+        return
+    if start is None:
+        integrator = _integrator(time_step, tolerance)
+        time = 0
+        x = y = 0.0
+    else:
+        integrator = start.integrator
+        time, x, y = start.time, start.dist, start.drop
+    landed = risen = False
+    while True:
+        if landed or drop is not None and y < -drop:
+            yield time, x, y, True
+        elif risen or rise is not None and y > rise:
+            yield time, x, y, False
+        else:
+            yield time, x, y, None
+        step, dx, dy = integrator.step(projectile, medium)
+
+        if tolerance is not None:
+            # Look for threshold crossings within the step
+            if rise is not None and y + integrator.apex() > rise:
+                risen = True
+            elif drop is not None and y + dy < -drop:
+                last = y
+                theta = integrators.bisect(lambda theta: last + integrator.interpolate(theta)[1] + drop)
+                step, dx, dy = integrator.retake(projectile, medium, theta)
+                landed = True
+        time += step
+        x += dx
+        y += dy
+
+
+def _fly_parabola(projectile: Projectile, medium: Medium, time_step: float, drop: float | None, 
+                  rise: float | None, tolerance: float | None, 
+                  start: Checkpoint | None = None) -> Iterator[tuple[float, float, float, bool | None]]:
+    """Sample the exact flight in a medium with gravity as the only force, see _fly.
+
+    Points are every time step, or only the start and the end with a 
+    tolerance. The last point is exactly where a threshold is crossed.
+    """
+    # The rest of the flight from a checkpoint is a parabola of its own, on the same time grid
+    time0, x0, y0 = (0, 0.0, 0.0) if start is None else (start.time, start.dist, start.drop)
+    path = analytic.Parabola(projectile.velocity, projectile.angle, medium.g)
+    landed = math.inf if drop is None else float(path.time_at_drop(drop + y0))
+    risen = math.inf if rise is None else float(path.time_at_rise(rise - y0))
+    end = min(landed, risen)
+    every = time_step if tolerance is None or end == math.inf else end
+    # Fixed steps are every time step from the launch, the first is the step after the checkpoint
+    first = offset = 0
+    if tolerance is None and time0:
+        offset = time0
+        first = round(time0 / time_step)
+        if abs(first * time_step - time0) > 1e-9 * time_step:
+            first = math.floor(time0 / time_step)
+    vel_x, vel_y, g = float(path.vel_x), float(path.vel_y), medium.g
+    for k in itertools.count(first):
+        time = k * every - offset if k > first else 0.0
+        stop = None
+        if time >= end:
+            time = end
+            stop = landed <= risen
+        if k > first:
+            vy = vel_y - g * time
+            projectile.velocity = (vel_x**2 + vy**2)**0.5
+            projectile.angle = math.atan(vy / vel_x)
+        yield time0 + time, x0 + vel_x * time, y0 + vel_y * time - g * time**2 / 2, stop
+
+
+def _integrator(time_step: float, tolerance: float | None) -> "integrators.Euler | integrators.DormandPrince":
+    """Fixed steps, or adaptive ones with a tolerance."""
+    if tolerance is None:
+        return integrators.Euler(time_step)
+    return integrators.DormandPrince(tolerance, time_step)
+
+
+def sim_batch(projectiles: "batch.SphereBatch | list[tuple[Projectile, Gun]]", medium: Medium,
+              drop: float, rise: float | None = None, time_step=0.001,
+              max_time: float | None = None) -> dict[str, np.ndarray]:
+    """Simulate the flight of many projectiles in a medium at once.
+
+    All shots are advanced together and each one is dropped from the
+    batch once it hits its stop condition. Matches sim to within float
+    rounding (relative error below 1e-9) for the same time step.
+
+    Returns a dictionary of per-shot arrays with the final dist, drop,
+    time, velocity, angle and angular_velocity of every shot, the apex
+    (highest drop value reached) and hit (True if the shot stopped by
+    dropping, False if it rose too high or ran out of time).
+
+    projectiles - a batch of projectiles already in flight, or a list of 
+    projectile/gun pairs to shoot
+
+    medium - to be used
+
+    drop - stop a shot once its drop is below -drop, may be per shot
+
+    rise - stop a shot with no hit once its drop is above rise, may be per 
+    shot
+
+    time_step - time step at which to evaluate physics
+
+    max_time - stop any shot still flying after this time with no hit
+    """
+    if not isinstance(projectiles, batch.SphereBatch):
+        groups = batch.from_pairs(projectiles)
+        results = {}
+        for index, group in groups:
+            part = sim_batch(group, medium, np.broadcast_to(drop, len(projectiles))[index],
+                             None if rise is None else np.broadcast_to(rise, len(projectiles))[index], 
+                             time_step, max_time)
+            for key, values in part.items():
+                results.setdefault(key, np.zeros(len(projectiles), dtype=values.dtype))[index] = values
+        return results
+
+    if analytic.drag_free(medium):
+        return _sim_batch_parabola(projectiles, medium, drop, rise, max_time)
+
+    n = len(projectiles)
+    drop = np.broadcast_to(-np.asarray(drop, dtype=float), n)
+    rise = np.broadcast_to(np.inf if rise is None else np.asarray(rise, dtype=float), n)
+    results = {"dist": np.zeros(n), "drop": np.zeros(n), "time": np.zeros(n),
+               "velocity": projectiles.velocity.copy(), "angle": projectiles.angle.copy(), 
+               "angular_velocity": projectiles.angular_velocity.copy(),
+               "apex": np.zeros(n), "hit": np.zeros(n, dtype=bool)}
+
+    # Indices of the shots still in flight
+    active = np.arange(n)
+    x = np.zeros(n)
+    y = np.zeros(n)
+    time = 0
+    while True:
+        hit = y < drop[active]
+        done = hit | (y > rise[active])
+        if max_time is not None and time >= max_time:
+            done[:] = True
+        if done.any():
+            index = active[done]
+            results["dist"][index] = x[done]
+            results["drop"][index] = y[done]
+            results["time"][index] = time
+            results["velocity"][index] = projectiles.velocity[done]
+            results["angle"][index] = projectiles.angle[done]
+            results["angular_velocity"][index] = projectiles.angular_velocity[done]
+            results["hit"][index] = hit[done]
+            if done.all():
+                return results
+            active = active[~done]
+            projectiles = projectiles.subset(~done)
+            x = x[~done]
+            y = y[~done]
+        dx, dy = batch.tick(projectiles, medium, time_step)
         time += time_step
+        x = x + dx
+        y = y + dy
+        results["apex"][active] = np.maximum(results["apex"][active], y)
+
+
+def _sim_batch_parabola(projectiles: "batch.SphereBatch", medium: Medium, drop: float, rise: float | None, 
+                        max_time: float | None) -> dict[str, np.ndarray]:
+    """The exact results of sim_batch in a medium with gravity as the only force.
+
+    Shots end exactly where they cross a threshold, or at max_time.
+    """
+    path = analytic.Parabola(projectiles.velocity, projectiles.angle, medium.g)
+    landed = path.time_at_drop(np.asarray(drop, dtype=float))
+    risen = np.broadcast_to(math.inf, len(projectiles)) if rise is None else path.time_at_rise(np.asarray(rise, dtype=float))
+    limit = np.minimum(risen, math.inf if max_time is None else max_time)
+    hit = landed <= limit
+    time = np.minimum(landed, limit)
+    x, y = path.position(time)
+    velocity, angle = path.state(time)
+    apex_time, _, apex = path.apex()
+    return {"dist": x, "drop": y, "time": time, "velocity": velocity, "angle": angle, 
+            "angular_velocity": projectiles.angular_velocity.copy(), 
+            "apex": np.where(apex_time <= time, apex, np.maximum(y, 0)), "hit": hit}
 
-        results["dist"].append(results["dist"][-1] + x)
-        results["drop"].append(results["drop"][-1] + y)
-        results["time"].append(time)
 
-        for arg in params:
-            if callable(getattr(projectile, arg)):
-                if len(inspect.signature(getattr(projectile, arg)).parameters) > 0:
-                    results[arg].append(getattr(projectile, arg)(medium))
-                else:
-                    results[arg].append(getattr(projectile, arg)())
-            else:
-                results[arg].append(getattr(projectile, arg))
+class SpinSolution(NamedTuple):
+    """A hop-up spin and the number of simulations it took to find."""
+    spin: float
+    sims: int
 
 
-def get_spin(projectile: Projectile, gun: Gun, medium: Medium, drop: float, rise: float, time_step=0.001) -> float:
+def get_spin(projectile: Projectile, gun: Gun, medium: Medium, drop: float, rise: float, time_step=0.001, 
+             tolerance: float | None = None, spin_tol=1.0, cache: "caching.Cache | bool" = False) -> float:
     """Find the max spin that will extend the range of the projectile."""
-    projectile = copy.deepcopy(projectile)
-    gun = copy.deepcopy(gun)
-    for spin in range(int(gun.vel(projectile) / projectile.diameter), 0, -int(gun.vel(projectile) / projectile.diameter / 1000)):
+    return solve_spin(projectile, gun, medium, drop, rise, time_step, tolerance, spin_tol, cache).spin
+
+
+def solve_spin(projectile: Projectile, gun: Gun, medium: Medium, drop: float, rise: float, time_step=0.001, 
+               tolerance: float | None = None, spin_tol=1.0, cache: "caching.Cache | bool" = False) -> SpinSolution:
+    """Find the max spin at which the projectile never rises above rise.
+
+    The spin is bracketed between none and velocity / diameter, then 
+    bisected down to spin_tol rad/s. The spin is -1 if even no spin 
+    rises too high.
+
+    projectile - to be shot
+
+    gun - to shoot the projectile, its spin is ignored
+
+    medium - to be used
+
+    drop - the flight ends once the drop is below -drop
+
+    rise - max drop allowed during the flight
+
+    time_step - time step at which to evaluate physics
+
+    tolerance - local error tolerance for adaptive time steps, if any
+
+    spin_tol - max error of the spin in rad/s
+
+    cache - look the solution up in a Cache first and store it there 
+    after, True uses the default cache
+    """
+    if cache:
+        return _memo(cache, "solve_spin", SpinSolution, 
+                     lambda: solve_spin(projectile, gun, medium, drop, rise, time_step, tolerance, spin_tol), 
+                     projectile=projectile.spec, gun=gun, medium=medium, drop=drop, rise=rise, 
+                     time_step=time_step, tolerance=tolerance, spin_tol=spin_tol)
+
+    projectile = projectile.spec.create()
+    gun = copy.copy(gun)
+    sims = 0
+
+    def stays_below(spin: float) -> bool:
+        nonlocal sims
+        sims += 1
         gun.set_spin(spin, projectile)
         gun.shoot(projectile)
-        res = sim(projectile, medium, lambda r: r["drop"][-1] < -drop, lambda r: r["drop"][-1] > rise, time_step)
-        if res:
-            print(spin)
-            return spin
-    return -1
+        return bool(sim(projectile, medium, time_step=time_step, drop=drop, rise=rise, tolerance=tolerance))
+
+    low, high = 0, gun.vel(projectile) / projectile.diameter
+    if analytic.drag_free(medium):
+        # Nothing acts on the spin, so either every spin stays below or none does
+        path = analytic.Parabola(gun.vel(projectile), gun.angle, medium.g)
+        return SpinSolution(high if path.time_at_drop(drop) <= path.time_at_rise(rise) else -1, sims)
+    if not stays_below(low):
+        return SpinSolution(-1, sims)
+    if stays_below(high):
+        return SpinSolution(high, sims)
+    while high - low > spin_tol:
+        mid = (low + high) / 2
+        if stays_below(mid):
+            low = mid
+        else:
+            high = mid
+    return SpinSolution(low, sims)
+
+
+def solve_spin_batch(projectiles: dict[str, Projectile], gun: Gun, medium: Medium, drop: float, rise: float, 
+                     time_step=0.001, spin_tol=1.0) -> dict[str, SpinSolution]:
+    """Find the max hop-up spin of every projectile at once, see solve_spin.
+
+    Each bisection step simulates every projectile still being solved 
+    in one batch. The sims count of each solution is the number of 
+    shots simulated for that projectile.
+    """
+    names = list(projectiles)
+    low = np.zeros(len(names))
+    high = np.array([gun.vel(p) / p.diameter for p in projectiles.values()])
+    sims = np.zeros(len(names), dtype=int)
+
+    def stays_below(index: np.ndarray, spins: np.ndarray) -> np.ndarray:
+        np.add.at(sims, index, 1)
+        pairs = []
+        for i, spin in zip(index, spins):
+            shooter = copy.copy(gun)
+            shooter.set_spin(spin, projectiles[names[i]])
+            pairs.append((projectiles[names[i]], shooter))
+        return sim_batch(pairs, medium, drop, rise, time_step)["hit"]
+
+    everyone = np.arange(len(names))
+    ends = stays_below(np.concatenate([everyone, everyone]), np.concatenate([low, high]))
+    spins = np.where(ends[len(names):], high, np.where(ends[:len(names)], np.nan, -1))
+    active = everyone[np.isnan(spins)]
+    while len(active):
+        mid = (low[active] + high[active]) / 2
+        below = stays_below(active, mid)
+        low[active[below]] = mid[below]
+        high[active[~below]] = mid[~below]
+        active = active[high[active] - low[active] > spin_tol]
+    spins = np.where(np.isnan(spins), low, spins)
+    return {name: SpinSolution(float(spin), int(n)) for name, spin, n in zip(names, spins, sims)}
+
 
-def max_range(projectile: Projectile, gun: Gun, medium: Medium, drop: float, time_step=0.001) -> float:
+# Shots per grid from which a batch is faster than the kernel one shot at a time
+BATCH_POINTS = 32
+
+
+class RangeSolution(NamedTuple):
+    """A max range, the angle to fire at for it and the number of simulations it took to find."""
+    angle: float
+    range: float
+    sims: int
+
+
+def max_range(projectile: Projectile, gun: Gun, medium: Medium, drop: float, time_step=0.001, 
+              tolerance: float | None = None, angle_tol=.01 * config.DEG_TO_RAD, 
+              cache: "caching.Cache | bool" = False) -> float:
     """Find the max range of a projectile, firing at a max angle."""
-    projectile = copy.deepcopy(projectile)
-    gun = copy.deepcopy(gun)
-    og_angle = gun.angle
-    gun.angle = 45 * config.DEG_TO_RAD
-    max_range = 0
-    range = sim(projectile, medium, lambda r: r["drop"][-1] < -drop, time_step=time_step)["dist"][-1]
-    while range > max_range:
-        max_range = range
-        gun.angle -= 1 * config.DEG_TO_RAD
-        gun.shoot(projectile)
-        range = sim(projectile, medium, lambda r: r["drop"][-1] < -drop, time_step=time_step)["dist"][-1]
-    gun.angle = og_angle
-    return max_range
+    return solve_range(projectile, gun, medium, drop, time_step, tolerance, angle_tol, cache=cache).range
+
+
+def solve_range(projectile: Projectile, gun: Gun, medium: Medium, drop: float, time_step=0.001, 
+                tolerance: float | None = None, angle_tol=.01 * config.DEG_TO_RAD, 
+                points=9, cache: "caching.Cache | bool" = False) -> RangeSolution:
+    """Find the angle to fire at for the max range of a projectile.
+
+    Starts from a grid of angles between 0 and 90 degrees, then keeps 
+    narrowing the grid around the farthest shot until it's finer than 
+    angle_tol. The angles of a grid are simulated one after the other 
+    with a fused kernel, or adaptive time steps when a tolerance is 
+    given. Grids of at least BATCH_POINTS angles with fixed time steps 
+    are simulated together in a batch instead.
+
+    projectile - to be shot
+
+    gun - to shoot the projectile, its angle is ignored
+
+    medium - to be used
+
+    drop - the flight ends once the drop is below -drop
+
+    time_step - time step at which to evaluate physics
+
+    tolerance - local error tolerance for adaptive time steps, if any
+
+    angle_tol - max error of the angle in rad
+
+    points - number of angles simulated per grid
+
+    cache - look the solution up in a Cache first and store it there 
+    after, True uses the default cache
+    """
+    if cache:
+        return _memo(cache, "solve_range", RangeSolution, 
+                     lambda: solve_range(projectile, gun, medium, drop, time_step, tolerance, angle_tol, points), 
+                     projectile=projectile.spec, gun=gun, medium=medium, drop=drop, time_step=time_step, 
+                     tolerance=tolerance, angle_tol=angle_tol, points=points)
+
+    if analytic.drag_free(medium):
+        angle, range = analytic.max_range(gun.vel(projectile), drop, medium.g)
+        return RangeSolution(float(angle), float(range), 0)
+    if tolerance is None and points >= BATCH_POINTS:
+        return solve_range_batch({None: (projectile, gun)}, medium, drop, time_step, angle_tol, points)[None]
+
+    projectile = projectile.spec.create()
+    gun = copy.copy(gun)
+
+    def ranges(index: np.ndarray, angles: np.ndarray) -> np.ndarray:
+        shots = []
+        for angle in angles:
+            gun.angle = angle
+            gun.shoot(projectile)
+            shots.append(sim(projectile, medium, time_step=time_step, drop=drop, tolerance=tolerance)["dist"][-1])
+        return np.array(shots)
+
+    angle, range, sims = _search_angles(1, ranges, angle_tol, points)
+    return RangeSolution(float(angle[0]), float(range[0]), int(sims[0]))
+
+
+def solve_range_batch(pairs: dict[str, tuple[Projectile, Gun]], medium: Medium, drop: float, time_step=0.001, 
+                      angle_tol=.01 * config.DEG_TO_RAD, points=9) -> dict[str, RangeSolution]:
+    """Find the max range of every projectile/gun pair at once, see solve_range.
+
+    Each grid of every pair still being solved is simulated in one batch.
+    """
+    if analytic.drag_free(medium):
+        return {name: solve_range(projectile, gun, medium, drop) for name, (projectile, gun) in pairs.items()}
+    names = list(pairs)
+
+    def ranges(index: np.ndarray, angles: np.ndarray) -> np.ndarray:
+        shots = []
+        for i, angle in zip(index, angles):
+            projectile, gun = pairs[names[i]]
+            shooter = copy.copy(gun)
+            shooter.angle = angle
+            shots.append((projectile, shooter))
+        return sim_batch(shots, medium, drop, time_step=time_step)["dist"]
+
+    angles, ranges, sims = _search_angles(len(names), ranges, angle_tol, points)
+    return {name: RangeSolution(float(a), float(r), int(n)) for name, a, r, n in zip(names, angles, ranges, sims)}
+
+
+def _search_angles(count: int, ranges: Callable, angle_tol: float, points: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Grid search for the angles with the max range of count shots.
+
+    ranges is called with the shot index and angle of every shot to 
+    simulate and returns their ranges. Returns the best angles, ranges 
+    and the number of simulations per shot.
+    """
+    low = np.zeros(count)
+    high = np.full(count, math.pi / 2)
+    best_angle = np.zeros(count)
+    best_range = np.full(count, -math.inf)
+    sims = np.zeros(count, dtype=int)
+    active = np.arange(count)
+    steps = np.arange(1, points + 1) / (points + 1)
+    while len(active):
+        grid = low[active, None] + (high - low)[active, None] * steps
+        dist = ranges(np.repeat(active, points), grid.ravel()).reshape(grid.shape)
+        sims[active] += points
+        best = dist.argmax(axis=1)
+        rows = np.arange(len(active))
+        better = dist[rows, best] > best_range[active]
+        best_angle[active[better]] = grid[rows, best][better]
+        best_range[active[better]] = dist[rows, best][better]
+        # Narrow to the grid points on either side of the farthest shot
+        low[active] = np.where(best > 0, grid[rows, np.maximum(best - 1, 0)], low[active])
+        high[active] = np.where(best < points - 1, grid[rows, np.minimum(best + 1, points - 1)], high[active])
+        active = active[(high - low)[active] / (points + 1) > angle_tol]
+    return best_angle, best_range, sims
+
+
+def _memo(cache: "caching.Cache | bool", kind: str, solution: type, solve: Callable, **inputs) -> NamedTuple:
+    """Look a solution up in the cache, or solve and store it."""
+    store = caching.resolve(cache)
+    key = store.key(kind, **inputs)
+    hit = store.get(key)
+    if hit is not None:
+        columns, _ = hit
+        return solution(*(convert(columns[name][0]) for name, convert in solution.__annotations__.items()))
+    result = solve()
+    store.put(key, {name: [value] for name, value in result._asdict().items()})
+    return result
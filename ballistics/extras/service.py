@@ -0,0 +1,434 @@
+"""A long running service that answers ballistics queries, one JSON object per line.
+
+Requests and responses are JSON objects, one per line, over stdio or a
+local unix socket. Every request has an op, one of OPS, the fields of
+that op, and optionally an id that's copied to its response. A response
+has either a result or an error, and responses are written as they're
+ready, not in the order of the requests.
+
+Requests for the same op with the same settings that arrive within a
+short window of each other are answered together, from one batch
+simulation in a worker process. Identical requests are only computed
+once. Answers are kept in memory, and each worker keeps the firing
+tables it has built, so repeated queries don't simulate again. Lines
+stop being read while too many requests are pending, which makes
+clients wait instead of filling memory.
+
+Run with python -m ballistics.extras.service, see --help. For example
+
+    {"id": 1, "op": "range", "projectile": "6mm0.20", "gun": "airsoftgun"}
+
+is answered with
+
+    {"id": 1, "result": {"angle": 0.4405769537394326, "range": 67.62481198084048, "sims": 45}}
+"""
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import copy
+import functools
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import socket
+import sys
+from typing import Any
+
+import numpy as np
+
+from ballistics.extras import config
+from ballistics.extras import firing
+from ballistics.extras import ranging
+from ballistics.guns import Gun
+from ballistics.mediums import Medium
+from ballistics.projectiles import Projectile
+
+# Medium presets requests can pick from
+MEDIUMS = {name: value for name, value in vars(config).items() if isinstance(value, Medium)}
+
+# Marks fields every request of an op must have
+REQUIRED = object()
+
+# Ops and their fields with defaults, settings a batch has in common and the fields of each request in it
+OPS = {
+    # Where a shot ends: dist, drop, time, velocity, apex and hit, angles in rad and spins in rad/s
+    "shot": ({"medium": "air_atp", "drop": 1.5, "rise": None, "time_step": 0.001, "max_time": 60.0},
+             {"projectile": REQUIRED, "gun": REQUIRED, "angle": None, "spin": None}),
+    # The dist, drop, time and velocity columns of a shot, at the dists if given
+    "trajectory": ({"medium": "air_atp", "drop": 1.5, "time_step": 0.001, "max_time": 60.0},
+                   {"projectile": REQUIRED, "gun": REQUIRED, "angle": None, "spin": None, "dists": None}),
+    # Max hop-up spin, see ranging.solve_spin
+    "spin": ({"gun": REQUIRED, "medium": "air_atp", "drop": 1.5, "rise": REQUIRED, "time_step": 0.001,
+              "spin_tol": 1.0},
+             {"projectile": REQUIRED}),
+    # Max range and the angle for it, see ranging.solve_range
+    "range": ({"medium": "air_atp", "drop": 1.5, "time_step": 0.001, "angle_tol": .01 * config.DEG_TO_RAD},
+              {"projectile": REQUIRED, "gun": REQUIRED}),
+    # Launch angle that hits dist x and drop y, from a firing table
+    "aim": ({"projectile": REQUIRED, "gun": REQUIRED, "medium": "air_atp", "drop": 10.0, "time_step": 0.001},
+            {"x": REQUIRED, "y": REQUIRED}),
+}
+
+
+class Service:
+    """Answers queries, coalescing them into batches run on a pool of workers."""
+
+    def __init__(self, workers: int | None = None, window=0.002, max_batch=256, max_pending=1024, answers=4096):
+        """
+        workers - number of worker processes, None for the number of
+        CPUs, 0 to work in a thread of this process instead
+
+        window - seconds to wait for more requests to batch with the
+        first one
+
+        max_batch - most requests in a batch, a full batch is run
+        without waiting
+
+        max_pending - most requests read and not answered yet, per
+        connection
+
+        answers - number of answers kept in memory
+        """
+        self.workers = workers
+        self.window = window
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.max_answers = answers
+        self._pool = None
+        self._slots = None
+        self._answers = collections.OrderedDict()
+        # Futures of the requests being answered, and the requests of every batch still gathering
+        self._waiting = {}
+        self._batches = {}
+        self._tasks = set()
+
+    async def __aenter__(self) -> "Service":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def start(self):
+        """Start the workers."""
+        if self.workers == 0:
+            self._pool = concurrent.futures.ThreadPoolExecutor(1)
+            slots = 1
+        else:
+            # Forked workers would hold on to copies of the connections' sockets, so they're started fresh
+            self._pool = concurrent.futures.ProcessPoolExecutor(self.workers, multiprocessing.get_context("spawn"))
+            slots = self.workers or os.cpu_count()
+        # Batches running or queued on the pool, a couple per worker keeps them all busy
+        self._slots = asyncio.Semaphore(2 * slots)
+
+    async def close(self):
+        """Answer the requests still gathering, then stop the workers."""
+        for group in list(self._batches):
+            self._flush(group)
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+        self._pool.shutdown()
+
+    async def query(self, request: dict) -> dict:
+        """Answer a request, the response has its id and a result or an error."""
+        response = {"id": request.get("id")}
+        try:
+            op, settings, item = _parse(request)
+        except (ValueError, TypeError) as e:
+            response["error"] = str(e)
+            return response
+        key = (op, settings, item)
+        if key in self._answers:
+            self._answers.move_to_end(key)
+            response.update(self._answers[key])
+            return response
+        future = self._waiting.get(key)
+        if future is None:
+            future = self._waiting[key] = asyncio.get_running_loop().create_future()
+            group = (op, settings)
+            batch = self._batches.setdefault(group, [])
+            batch.append(item)
+            if len(batch) >= self.max_batch:
+                self._flush(group)
+            elif len(batch) == 1:
+                asyncio.get_running_loop().call_later(self.window, self._flush, group)
+        response.update(await asyncio.shield(future))
+        return response
+
+    def _flush(self, group: tuple):
+        """Run the batch of the group, if it's still gathering."""
+        items = self._batches.pop(group, None)
+        if items:
+            task = asyncio.create_task(self._run(group, items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, group: tuple, items: list[tuple]):
+        op, settings = group
+        async with self._slots:
+            try:
+                answers = await asyncio.get_running_loop().run_in_executor(
+                    self._pool, _work, op, dict(settings), [dict(item) for item in items])
+            except Exception as e:
+                answers = [{"error": f"{type(e).__name__}: {e}"}] * len(items)
+        for item, answer in zip(items, answers):
+            key = (op, settings, item)
+            if "result" in answer:
+                self._answers[key] = answer
+                if len(self._answers) > self.max_answers:
+                    self._answers.popitem(last=False)
+            self._waiting.pop(key).set_result(answer)
+
+    async def serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer the request lines of a connection until it's closed."""
+        pending = asyncio.Semaphore(self.max_pending)
+        tasks = set()
+
+        async def answer(line: bytes):
+            try:
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    response = {"id": None, "error": f"invalid JSON: {e}"}
+                else:
+                    if isinstance(request, dict):
+                        response = await self.query(request)
+                    else:
+                        response = {"id": None, "error": "a request must be a JSON object"}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+            finally:
+                pending.release()
+
+        while line := await reader.readline():
+            if not line.strip():
+                continue
+            # Stop reading while too many requests are pending
+            await pending.acquire()
+            task = asyncio.create_task(answer(line))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        writer.close()
+
+
+class Client:
+    """Sends requests to a service and matches up the responses."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count()
+        self._futures = {}
+        self._receiving = asyncio.create_task(self._receive())
+        self._serving = None
+
+    @classmethod
+    async def connect(cls, path: str) -> "Client":
+        """A client of a service on a unix socket."""
+        return cls(*await asyncio.open_unix_connection(path))
+
+    @classmethod
+    async def local(cls, service: Service) -> "Client":
+        """A client of a service in this process, over a socket pair, with no network or files."""
+        ours, theirs = socket.socketpair()
+        client = cls(*await asyncio.open_connection(sock=ours))
+        client._serving = asyncio.create_task(service.serve(*await asyncio.open_connection(sock=theirs)))
+        return client
+
+    async def query(self, op: str, **fields) -> Any:
+        """The result of a request, raises ValueError with the error if there's one."""
+        response = await self.request({"op": op, **fields})
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["result"]
+
+    async def request(self, request: dict) -> dict:
+        """Send a request and wait for its response, its id is set by the client."""
+        request_id = next(self._ids)
+        future = self._futures[request_id] = asyncio.get_running_loop().create_future()
+        self._writer.write(json.dumps({**request, "id": request_id}).encode() + b"\n")
+        await self._writer.drain()
+        return await future
+
+    async def _receive(self):
+        while line := await self._reader.readline():
+            response = json.loads(line)
+            self._futures.pop(response["id"]).set_result(response)
+        for future in self._futures.values():
+            future.set_exception(ConnectionError("the service closed the connection"))
+
+    async def close(self):
+        """Close the connection, once every response is in."""
+        self._writer.close()
+        await self._receiving
+        if self._serving is not None:
+            await self._serving
+
+
+def _parse(request: dict) -> tuple[str, tuple, tuple]:
+    """The op, and the batch settings and request fields as sorted (name, value) pairs.
+
+    Raises ValueError if the op, a name or a field is unknown, or a
+    required field is missing.
+    """
+    op = request.get("op")
+    if op not in OPS:
+        raise ValueError(f"unknown op {op}, pick from {', '.join(OPS)}")
+    shared, own = OPS[op]
+    unknown = set(request) - set(shared) - set(own) - {"op", "id"}
+    if unknown:
+        raise ValueError(f"unknown fields {', '.join(sorted(unknown))} for {op}")
+    fields = []
+    for defaults in (shared, own):
+        values = {}
+        for name, default in defaults.items():
+            value = request.get(name, default)
+            if value is REQUIRED:
+                raise ValueError(f"{op} needs {name}")
+            values[name] = _check(name, value)
+        fields.append(tuple(sorted(values.items())))
+    return op, fields[0], fields[1]
+
+
+def _check(name: str, value):
+    """The value of a field, hashable, after checking its type and that names exist."""
+    catalogues = {"projectile": config.projectile_list, "gun": config.gun_list, "medium": MEDIUMS}
+    if name in catalogues:
+        if value not in catalogues[name]:
+            raise ValueError(f"unknown {name} {value}")
+        return value
+    if name == "dists":
+        if value is None:
+            return None
+        if not isinstance(value, list):
+            raise TypeError("dists must be a list of numbers")
+        return tuple(_number(name, v) for v in value)
+    return None if value is None else _number(name, value)
+
+
+def _number(name: str, value) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(f"{name} must be a number")
+    return float(value)
+
+
+def _work(op: str, settings: dict, items: list[dict]) -> list[dict]:
+    """Answer a batch of requests, in a worker, as {"result": ...} or {"error": ...} each."""
+    medium = MEDIUMS[settings["medium"]]
+    if op == "shot":
+        pairs = [_shot(item) for item in items]
+        results = ranging.sim_batch(pairs, medium, settings["drop"], settings["rise"], settings["time_step"],
+                                    settings["max_time"])
+        return [{"result": {name: _json(results[name][i]) for name in ("dist", "drop", "time", "velocity", "apex", "hit")}}
+                for i in range(len(items))]
+    if op == "trajectory":
+        return [{"result": _trajectory(*_shot(item), medium, item["dists"], settings["drop"], settings["time_step"],
+                                       settings["max_time"])} for item in items]
+    if op == "spin":
+        projectiles = {i: config.projectile_list[item["projectile"]] for i, item in enumerate(items)}
+        solutions = ranging.solve_spin_batch(projectiles, config.gun_list[settings["gun"]], medium, settings["drop"],
+                                             settings["rise"], settings["time_step"], settings["spin_tol"])
+        return [{"result": solutions[i]._asdict()} for i in range(len(items))]
+    if op == "range":
+        pairs = {i: (config.projectile_list[item["projectile"]], config.gun_list[item["gun"]])
+                 for i, item in enumerate(items)}
+        solutions = ranging.solve_range_batch(pairs, medium, settings["drop"], settings["time_step"],
+                                              settings["angle_tol"])
+        return [{"result": solutions[i]._asdict()} for i in range(len(items))]
+    table = _table(settings["projectile"], settings["gun"], settings["medium"], settings["drop"], settings["time_step"])
+    answers = []
+    for item in items:
+        try:
+            answers.append({"result": {"angle": table.angle_for(item["x"], item["y"])}})
+        except ValueError as e:
+            answers.append({"error": str(e)})
+    return answers
+
+
+def _shot(item: dict) -> tuple[Projectile, Gun]:
+    """The projectile and a copy of the gun of a request, with its angle and spin if it has them."""
+    projectile = config.projectile_list[item["projectile"]]
+    gun = copy.copy(config.gun_list[item["gun"]])
+    if item["angle"] is not None:
+        gun.angle = item["angle"]
+    if item["spin"] is not None:
+        gun.set_spin(item["spin"], projectile)
+    return projectile, gun
+
+
+def _trajectory(projectile: Projectile, gun: Gun, medium: Medium, dists: tuple | None, drop: float,
+                time_step: float, max_time: float) -> dict[str, list]:
+    r = ranging.sim(gun.launch(projectile.spec), medium, lambda r: r["time"][-1] >= max_time, None, time_step,
+                    "velocity", drop=drop)
+    if dists is None:
+        return {name: _json(list(r[name])) for name in ("dist", "drop", "time", "velocity")}
+    dists = np.array(dists)
+    return {"dist": list(dists), **{name: _json(list(r.at_dist(name, dists))) for name in ("drop", "time", "velocity")}}
+
+
+@functools.lru_cache(maxsize=64)
+def _table(projectile: str, gun: str, medium: str, drop: float, time_step: float) -> "firing.FiringTable":
+    """A firing table, kept for the next requests this worker gets."""
+    return firing.FiringTable.build(config.projectile_list[projectile], config.gun_list[gun], MEDIUMS[medium], drop,
+                                    time_step=time_step)
+
+
+def _json(value):
+    """A value with numpy types turned into Python ones, and NaN and infinities into None."""
+    if isinstance(value, list):
+        return [_json(v) for v in value]
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+class _Stdio:
+    """stdin and stdout with the stream methods serve uses, for pipes, files and terminals alike."""
+
+    async def readline(self) -> bytes:
+        return await asyncio.to_thread(sys.stdin.buffer.readline)
+
+    def write(self, data: bytes):
+        sys.stdout.buffer.write(data)
+
+    async def drain(self):
+        sys.stdout.buffer.flush()
+
+    def close(self):
+        sys.stdout.buffer.flush()
+
+
+async def run(service: Service, path: str | None = None):
+    """Serve on a unix socket at the path until cancelled, or over stdio until stdin is closed."""
+    async with service:
+        if path is None:
+            stdio = _Stdio()
+            await service.serve(stdio, stdio)
+            return
+        server = await asyncio.start_unix_server(service.serve, path)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m ballistics.extras.service", description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", help="unix socket path to listen on, stdio if not given")
+    parser.add_argument("--workers", default=None, type=int, help="worker processes, 0 for none, defaults to the CPU count")
+    parser.add_argument("--window", default=0.002, type=float, help="seconds to gather a batch for")
+    parser.add_argument("--max-batch", default=256, type=int, help="most requests in a batch")
+    parser.add_argument("--max-pending", default=1024, type=int, help="most unanswered requests per connection")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(run(Service(args.workers, args.window, args.max_batch, args.max_pending), args.socket))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
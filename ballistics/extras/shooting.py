@@ -0,0 +1,269 @@
+"""Solve for the launch angle, and optionally spin, that hits target points.
+
+Each flight is integrated together with its sensitivities, the
+derivatives of the state with respect to the launch angle and spin. The
+drops at the targets and their derivatives then give Newton (one
+unknown) or Gauss-Newton (more unknowns or targets) updates, which
+usually converge in a handful of flights.
+
+The sensitivities are finite-difference estimates, not solutions of the
+sensitivity equations: every fixed time step, the same as sim's, is
+taken again from a slightly moved state, and the difference is carried
+along the flight. That's on purpose. The coefficients are piecewise,
+with branches on the Reynolds number and spin, and differencing the step
+itself gives the derivative of the stepped flight that's actually
+solved, for any projectile and medium, without derivatives of every
+coefficient formula.
+"""
+import copy
+import math
+from typing import Callable
+from typing import NamedTuple
+
+import numpy as np
+
+from ballistics.extras import analytic
+from ballistics.extras import kernels
+from ballistics.guns import Gun
+from ballistics.mediums import Medium
+from ballistics.projectiles import Projectile
+
+
+# Spins tried for a start when the gun's spin is too small to solve from
+SPIN_POINTS = 10
+
+
+class ShotSolution(NamedTuple):
+    """A launch angle and spin, how far off the targets they are, and what it took to find them."""
+    angle: float
+    spin: float
+    residual: float
+    iterations: int
+    sims: int
+    evaluations: int
+
+
+class Flight(NamedTuple):
+    """Drops at the target distances and their derivatives by the solved parameters."""
+    drops: np.ndarray
+    jacobian: np.ndarray
+    evaluations: int
+
+
+def aim(projectile: Projectile, gun: Gun, medium: Medium, x: float, y: float, time_step=0.001,
+        tolerance=1e-6, max_iter=20) -> ShotSolution:
+    """Find the launch angle that hits the point at distance x and drop y, see solve."""
+    return solve(projectile, gun, medium, [(x, y)], False, time_step, tolerance, max_iter)
+
+
+def solve(projectile: Projectile, gun: Gun, medium: Medium, targets: list[tuple[float, float]], spin=False,
+          time_step=0.001, tolerance=1e-6, max_iter=20, max_time=60.0) -> ShotSolution:
+    """Find the launch angle, and the spin if asked, whose flight passes through the targets.
+
+    Starts from the gun's angle and spin. Steps that don't bring the
+    drops closer to the targets are halved. With more unknowns than
+    targets the smallest step is taken, with more targets than unknowns
+    the squared misses are minimized.
+
+    projectile - to be shot
+
+    gun - to shoot the projectile
+
+    medium - to be used
+
+    targets - (distance, drop) points in m
+
+    spin - also solve for the spin
+
+    time_step - time step at which to evaluate physics
+
+    tolerance - largest miss in m, at any target, to stop at
+
+    max_iter - most iterations, the last solution is returned if it
+    didn't converge by then, check the residual
+
+    max_time - longest flight in s, raises ValueError if the flight
+    doesn't reach every target by then
+
+    Lift jumps at no spin, so a solved spin is kept above a small floor,
+    a ten thousandth of velocity / diameter. Lift also changes sign with
+    the spin, so when the gun's spin is below that floor the spin starts
+    from a coarse grid up to velocity / diameter instead, at the one an
+    angle change alone brings closest to the targets. If the drops or
+    their derivatives stop being finite, the best solution so far is
+    returned, check the residual.
+
+    In a medium with gravity as the only force the spin doesn't change
+    the flight, so only the angle is solved and the spin is the gun's. A
+    single target is then solved exactly, and the flights for more
+    targets are parabolas worked out in closed form instead of stepped.
+    """
+    free = analytic.drag_free(medium)
+    if free:
+        spin = False
+    if free and len(targets) == 1:
+        shot = gun.launch(projectile.spec)
+        (x, y), = targets
+        return ShotSolution(analytic.aim(shot.velocity, x, y, medium.g), shot.angular_velocity, 0.0, 0, 0, 0)
+    targets = sorted(targets)
+    xs = np.array([x for x, _ in targets], dtype=float)
+    ys = np.array([y for _, y in targets], dtype=float)
+    shot = gun.launch(projectile.spec)
+    params = np.array([shot.angle, shot.angular_velocity], dtype=float)
+    # Lift has a jump at no spin, keep clear of it
+    floor = shot.velocity / projectile.diameter * 1e-4
+    solved = [0, 1] if spin else [0]
+    step = None if free else _stepper(shot, medium, time_step)
+
+    sims = 0
+    evaluations = 0
+
+    def fly(params: np.ndarray) -> Flight:
+        nonlocal sims, evaluations
+        sims += 1
+        if free:
+            flight = _fly_parabola(shot.velocity, params[0], xs, medium.g, max_time)
+        else:
+            flight = _fly(step, shot.velocity, params[0], params[1], solved, xs, time_step, max_time)
+        evaluations += flight.evaluations
+        return flight
+
+    if spin and params[1] < floor:
+        params[1], flight = _bracket_spin(fly, params[0], shot.velocity / projectile.diameter, ys)
+    else:
+        flight = fly(params)
+    # Spin changes are much larger than angle changes, compare them in units of these
+    scale = np.array([1, max(params[1], 1)])[solved]
+    miss = flight.drops - ys
+    iterations = 0
+    while np.max(np.abs(miss)) > tolerance and iterations < max_iter:
+        iterations += 1
+        delta = np.zeros(2)
+        try:
+            delta[solved] = -np.linalg.lstsq(flight.jacobian * scale, miss, rcond=None)[0] * scale
+        except np.linalg.LinAlgError:
+            break
+        if not np.isfinite(delta).all():
+            break
+        for _ in range(10):
+            trial = params + delta
+            trial[0] = min(max(trial[0], -math.pi / 2 + 1e-6), math.pi / 2 - 1e-6)
+            if spin:
+                trial[1] = max(trial[1], floor)
+            try:
+                new = fly(trial)
+            except ValueError:
+                delta /= 2
+                continue
+            finite = np.isfinite(new.drops).all() and np.isfinite(new.jacobian).all()
+            if finite and np.sum((new.drops - ys)**2) < np.sum(miss**2):
+                break
+            delta /= 2
+        else:
+            break
+        params, flight, miss = trial, new, new.drops - ys
+    return ShotSolution(float(params[0]), float(params[1]), float(np.max(np.abs(miss))), iterations, sims, evaluations)
+
+
+def _bracket_spin(fly: Callable[[np.ndarray], Flight], angle: float, high: float, ys: np.ndarray,
+                  points=SPIN_POINTS) -> tuple[float, Flight]:
+    """The spin of a grid between none and high to start solving from, and its flight.
+
+    Each spin is flown at the angle, and scored by the miss left after
+    the angle change that best fits its linearized drops to ys.
+    """
+    best = (math.inf, None, None)
+    for spin in np.arange(1, points + 1) / points * high:
+        try:
+            flight = fly(np.array([angle, spin]))
+        except ValueError:
+            continue
+        if not (np.isfinite(flight.drops).all() and np.isfinite(flight.jacobian).all()):
+            continue
+        miss = flight.drops - ys
+        slope = flight.jacobian[:, 0]
+        left = miss - slope * (slope @ miss) / (slope @ slope) if slope @ slope > 0 else miss
+        if np.sum(left**2) < best[0]:
+            best = (np.sum(left**2), spin, flight)
+    if best[1] is None:
+        raise ValueError("no spin up to velocity / diameter reaches every target")
+    return best[1], best[2]
+
+
+def _stepper(projectile: Projectile, medium: Medium, time_step: float) -> Callable:
+    """A step function of velocity, angle and angular velocity, see kernels.Step.
+
+    Uses a kernel if there's one for the types, or Projectile.tick on a
+    scratch projectile otherwise.
+    """
+    run = kernels.compile_step(projectile, medium)
+    if run is not None:
+        return lambda velocity, angle, angular_velocity: run(velocity, angle, angular_velocity, time_step)
+    scratch = copy.copy(projectile)
+
+    def step(velocity: float, angle: float, angular_velocity: float) -> tuple:
+        scratch.velocity, scratch.angle, scratch.angular_velocity = velocity, angle, angular_velocity
+        x, y = scratch.tick(medium, time_step)
+        return scratch.velocity, scratch.angle, scratch.angular_velocity, x, y
+
+    return step
+
+
+def _fly(step: Callable, velocity: float, angle: float, spin: float, solved: list[int], xs: np.ndarray,
+         time_step: float, max_time: float) -> Flight:
+    """Integrate a flight and its sensitivities until it passes every target distance."""
+    # State is x, y, velocity, angle, angular velocity, with one sensitivity per solved parameter
+    state = (0.0, 0.0, velocity, angle, spin)
+    sensitivities = [(0.0, 0.0, 0.0, 1.0, 0.0), (0.0, 0.0, 0.0, 0.0, 1.0)]
+    sensitivities = [sensitivities[i] for i in solved]
+    drops = np.empty(len(xs))
+    jacobian = np.empty((len(xs), len(solved)))
+    evaluations = 0
+    target = 0
+    time = 0.0
+    while target < len(xs):
+        if time > max_time:
+            raise ValueError(f"the flight doesn't reach {xs[target]} m")
+        x, y, v, a, w = state
+        v1, a1, w1, dx, dy = step(v, a, w)
+        evaluations += 1
+        new = (x + dx, y + dy, v1, a1, w1)
+        moved = []
+        for s in sensitivities:
+            size = max(abs(s[2]), abs(s[3]), abs(s[4]))
+            if size == 0:
+                moved.append(s)
+                continue
+            # Directional derivative of the step along the sensitivity
+            h = 1e-7 * max(1, abs(v), abs(w)) / size
+            pv, pa, pw, pdx, pdy = step(v + h * s[2], a + h * s[3], w + h * s[4])
+            evaluations += 1
+            moved.append((s[0] + (pdx - dx) / h, s[1] + (pdy - dy) / h, (pv - v1) / h, (pa - a1) / h, (pw - w1) / h))
+
+        # Interpolate the drops and sensitivities at every target passed this step
+        while target < len(xs) and new[0] >= xs[target]:
+            f = (xs[target] - x) / (new[0] - x) if new[0] > x else 1
+            slope = (new[1] - y) / (new[0] - x) if new[0] > x else 0
+            drops[target] = y + f * (new[1] - y)
+            for j, (s, m) in enumerate(zip(sensitivities, moved)):
+                # The target is at a fixed distance, so moving along x changes the drop by the slope
+                sx = s[0] + f * (m[0] - s[0])
+                sy = s[1] + f * (m[1] - s[1])
+                jacobian[target, j] = sy - slope * sx
+            target += 1
+        state, sensitivities = new, moved
+        time += time_step
+    return Flight(drops, jacobian, evaluations)
+
+
+def _fly_parabola(velocity: float, angle: float, xs: np.ndarray, g: float, max_time: float) -> Flight:
+    """The drops of a flight under gravity alone at the target distances, and their derivatives by the angle."""
+    flight = analytic.Parabola(velocity, angle, g)
+    time = flight.time_at_dist(xs[-1])
+    if time > max_time:
+        raise ValueError(f"the flight doesn't reach {xs[-1]} m")
+    _, drops = flight.position(flight.time_at_dist(xs))
+    # drop = x tan(angle) - g x^2 / (2 velocity^2 cos(angle)^2), differentiated by the angle
+    cos = math.cos(angle)
+    jacobian = (xs / cos**2 - g * xs**2 * math.sin(angle) / (velocity**2 * cos**3))[:, None]
+    return Flight(drops, jacobian, 0)
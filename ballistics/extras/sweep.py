@@ -0,0 +1,258 @@
+"""Simulate every combination of guns, projectiles, mediums, angles and spins.
+
+Combinations are split into chunks and simulated on a process pool. Each
+chunk is written to its own file in the output directory as soon as it's
+done, so results never have to fit in memory, and an interrupted sweep
+picks up where it left off when run again.
+
+Run with python -m ballistics.extras.sweep, see --help for options.
+"""
+import argparse
+import concurrent.futures
+import copy
+import itertools
+import json
+import math
+import os
+import sys
+from typing import Callable
+from typing import Iterator
+
+import numpy as np
+
+from ballistics.extras import config
+from ballistics.extras import ranging
+from ballistics.guns import Gun
+from ballistics.mediums import Medium
+from ballistics.projectiles import Projectile
+
+# Columns of the results table, the first five describe the case
+COLUMNS = ("gun", "projectile", "medium", "angle", "spin",
+           "dist", "drop", "time", "velocity", "apex", "hit")
+
+# Catalogue the workers simulate from, set by _init
+_catalogue = None
+
+
+def cases(guns: list[str], projectiles: list[str], mediums: list[str], angles: list[float],
+          spins: list[float | None]) -> Iterator[tuple[str, str, str, float, float | None]]:
+    """Every (gun, projectile, medium, angle, spin) combination, in a fixed order."""
+    return itertools.product(guns, projectiles, mediums, angles, spins)
+
+
+def simulate(gun: Gun, projectile: Projectile, medium: Medium, angle: float, spin: float | None,
+             drop: float, time_step=0.001, max_time=60.0) -> tuple[float, float, float, float, float, bool]:
+    """Shoot one case, return its dist, drop, time, velocity, apex and hit columns.
+
+    spin - in rad/s, or None to keep the gun's own spin
+
+    drop - the flight ends once the drop is below -drop
+
+    time_step - time step at which to evaluate physics
+
+    max_time - the flight ends after this long even if it didn't drop,
+    hit is False then
+    """
+    gun = copy.copy(gun)
+    gun.angle = angle
+    if spin is not None:
+        gun.set_spin(spin, projectile)
+    projectile = gun.launch(projectile.spec)
+    r = ranging.sim(projectile, medium, lambda r: r["time"][-1] >= max_time, None, time_step, "velocity", drop=drop)
+    return r["dist"][-1], r["drop"][-1], r["time"][-1], r["velocity"][-1], r.max_rise, r.landed
+
+
+def sweep(path: str, guns: dict[str, Gun], projectiles: dict[str, Projectile], mediums: dict[str, Medium],
+          angles: list[float], spins: list[float | None] = (None,), drop=1.5, time_step=0.001, max_time=60.0,
+          chunk_size=64, workers: int | None = None, progress: Callable[[int, int], None] | None = None) -> int:
+    """Simulate every combination, writing the results table to the path directory.
+
+    Returns the number of chunks simulated, chunks already in the
+    directory from an earlier run with the same parameters are skipped.
+
+    path - output directory, created if needed
+
+    guns, projectiles, mediums - names to objects, names are stored in
+    the table
+
+    angles - in rad
+
+    spins - in rad/s, None keeps the gun's own spin
+
+    chunk_size - cases per chunk file
+
+    workers - number of processes, defaults to the number of CPUs
+
+    progress - called with the chunks done and the total chunks
+
+    The other arguments are the same as for simulate.
+    """
+    names = (list(guns), list(projectiles), list(mediums))
+    parameters = {"guns": names[0], "projectiles": names[1], "mediums": names[2], "angles": list(angles),
+                  "spins": list(spins), "drop": drop, "time_step": time_step, "max_time": max_time,
+                  "chunk_size": chunk_size}
+    os.makedirs(path, exist_ok=True)
+    manifest = os.path.join(path, "sweep.json")
+    if os.path.exists(manifest):
+        with open(manifest) as f:
+            if json.load(f) != parameters:
+                raise ValueError(f"{path} holds a sweep with different parameters")
+    else:
+        _write_atomic(manifest, lambda f: f.write(json.dumps(parameters, indent=1).encode()))
+
+    total = math.ceil(len(names[0]) * len(names[1]) * len(names[2]) * len(angles) * len(spins) / chunk_size)
+    todo = [i for i in range(total) if not os.path.exists(_chunk_path(path, i))]
+    done = total - len(todo)
+    if progress:
+        progress(done, total)
+    if not todo:
+        return 0
+
+    workers = workers or os.cpu_count()
+    chunks = _chunks(cases(*names, angles, spins), chunk_size)
+    catalogue = (guns, projectiles, mediums)
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=_init, initargs=(catalogue,)) as pool:
+        pending = set()
+        for i, chunk in chunks:
+            if not os.path.exists(_chunk_path(path, i)):
+                # Keep a few chunks per worker queued, not the whole sweep
+                if len(pending) >= 2 * workers:
+                    finished, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    done += _collect(finished)
+                    if progress:
+                        progress(done, total)
+                pending.add(pool.submit(_run_chunk, _chunk_path(path, i), chunk, drop, time_step, max_time))
+        for future in concurrent.futures.as_completed(pending):
+            done += _collect((future,))
+            if progress:
+                progress(done, total)
+    return len(todo)
+
+
+def load(path: str) -> dict[str, np.ndarray]:
+    """Read the results table of a sweep, column names to arrays.
+
+    Only finished chunks are read, so this also works on a sweep that's
+    still running or was interrupted. The spin is NaN for cases that kept
+    the gun's own spin.
+    """
+    with open(os.path.join(path, "sweep.json")) as f:
+        parameters = json.load(f)
+    count = math.prod(len(parameters[name]) for name in ("guns", "projectiles", "mediums", "angles", "spins"))
+    columns = {name: [] for name in COLUMNS}
+    for i in range(math.ceil(count / parameters["chunk_size"])):
+        chunk = _chunk_path(path, i)
+        if not os.path.exists(chunk):
+            continue
+        with np.load(chunk) as data:
+            for name in COLUMNS:
+                columns[name].append(data[name])
+    return {name: np.concatenate(values) if values else np.array([]) for name, values in columns.items()}
+
+
+def _chunks(iterable: Iterator, size: int) -> Iterator[tuple[int, list]]:
+    """Split the iterable into numbered lists of size items."""
+    iterator = iter(iterable)
+    for i in itertools.count():
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield i, chunk
+
+
+def _chunk_path(path: str, i: int) -> str:
+    return os.path.join(path, f"chunk-{i:06d}.npz")
+
+
+def _write_atomic(path: str, write: Callable):
+    """Write to a temporary file then rename it, so a file is either complete or missing."""
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as f:
+        write(f)
+    os.replace(temp, path)
+
+
+def _collect(futures) -> int:
+    for future in futures:
+        future.result()
+    return len(futures)
+
+
+def _init(catalogue: tuple[dict, dict, dict]):
+    global _catalogue
+    _catalogue = catalogue
+
+
+def _run_chunk(path: str, chunk: list[tuple], drop: float, time_step: float, max_time: float):
+    """Simulate the cases of a chunk in a worker and write its file."""
+    guns, projectiles, mediums = _catalogue
+    rows = [simulate(guns[g], projectiles[p], mediums[m], angle, spin, drop, time_step, max_time)
+            for g, p, m, angle, spin in chunk]
+    gun, projectile, medium, angle, spin = zip(*chunk)
+    dist, drop_, time, velocity, apex, hit = zip(*rows)
+    columns = {"gun": np.array(gun), "projectile": np.array(projectile), "medium": np.array(medium),
+               "angle": np.array(angle, dtype=float),
+               "spin": np.array([math.nan if s is None else s for s in spin], dtype=float),
+               "dist": np.array(dist), "drop": np.array(drop_), "time": np.array(time),
+               "velocity": np.array(velocity), "apex": np.array(apex), "hit": np.array(hit)}
+    _write_atomic(path, lambda f: np.savez(f, **columns))
+
+
+def _mediums() -> dict[str, Medium]:
+    """The medium presets in config."""
+    return {name: value for name, value in vars(config).items() if isinstance(value, Medium)}
+
+
+def _names(text: str, catalogue: dict) -> list[str]:
+    if text == "all":
+        return list(catalogue)
+    names = text.split(",")
+    for name in names:
+        if name not in catalogue:
+            raise argparse.ArgumentTypeError(f"unknown name {name}, pick from {', '.join(catalogue)}")
+    return names
+
+
+def _grid(text: str) -> list[float]:
+    """Comma separated values, or start:stop:step with stop included."""
+    if ":" in text:
+        start, stop, step = (float(v) for v in text.split(":"))
+        return [start + i * step for i in range(int(round((stop - start) / step)) + 1)]
+    return [float(v) for v in text.split(",")]
+
+
+def main(argv: list[str] | None = None):
+    mediums = _mediums()
+    parser = argparse.ArgumentParser(prog="python -m ballistics.extras.sweep", description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="output directory, an interrupted sweep in it is resumed")
+    parser.add_argument("--guns", default="all", help="comma separated config.gun_list names, or all")
+    parser.add_argument("--projectiles", default="all", help="comma separated config.projectile_list names, or all")
+    parser.add_argument("--mediums", default="air_atp", help=f"comma separated presets from {', '.join(mediums)}, or all")
+    parser.add_argument("--angles", default="0", type=_grid, help="angles in degrees, a,b,c or start:stop:step")
+    parser.add_argument("--spins", default=None, type=_grid, help="spins in rad/s, defaults to the gun's own")
+    parser.add_argument("--drop", default=1.5, type=float, help="drop in m at which the flight ends")
+    parser.add_argument("--time-step", default=0.001, type=float, help="time step in s")
+    parser.add_argument("--max-time", default=60.0, type=float, help="longest flight in s")
+    parser.add_argument("--chunk-size", default=64, type=int, help="cases per chunk file")
+    parser.add_argument("--workers", default=None, type=int, help="number of processes, defaults to the CPU count")
+    args = parser.parse_args(argv)
+
+    try:
+        guns = {name: config.gun_list[name] for name in _names(args.guns, config.gun_list)}
+        projectiles = {name: config.projectile_list[name] for name in _names(args.projectiles, config.projectile_list)}
+        picked = {name: mediums[name] for name in _names(args.mediums, mediums)}
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    def progress(done: int, total: int):
+        print(f"\r{done}/{total} chunks", end="" if done < total else "\n", file=sys.stderr, flush=True)
+
+    try:
+        sweep(args.path, guns, projectiles, picked, [a * config.DEG_TO_RAD for a in args.angles],
+              args.spins or [None], args.drop, args.time_step, args.max_time, args.chunk_size, args.workers, progress)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Recorded flights of projectiles."""
+import array
+import bisect
+import collections
+import functools
+import inspect
+import math
+import numbers
+from collections.abc import MutableMapping
+from typing import Callable
+from typing import Iterator
+from typing import NamedTuple
+
+import numpy as np
+
+from ballistics.mediums import Medium
+from ballistics.projectiles import Projectile
+
+
+class Point(NamedTuple):
+    """A recorded point of a flight."""
+    time: float
+    dist: float
+    drop: float
+
+
+class Trajectory(MutableMapping):
+    """Projectile properties recorded over a flight, stored by column.
+
+    Works like a dictionary of property names to lists of values.
+    Numeric columns are kept in typed arrays of doubles, which take a
+    quarter of the memory of a list of floats.
+
+    Columns can be looked up by the dist or time columns, which never
+    decrease over a flight, with a binary search instead of a scan. The
+    arrays used for many lookups at once and the apex, impact and max
+    rise are worked out on first use and kept until the trajectory
+    changes.
+    """
+
+    def __init__(self, columns: dict | None = None):
+        """columns - property names to initial lists of values"""
+        self._columns = {}
+        self._cache = {}
+        for name, values in (columns or {}).items():
+            self[name] = values
+
+    @classmethod
+    def wrap(cls, columns: dict) -> "Trajectory":
+        """A trajectory that uses the given columns as they are, without copying."""
+        results = cls()
+        results._columns = dict(columns)
+        return results
+
+    def __getitem__(self, name: str):
+        return self._columns[name]
+
+    def __setitem__(self, name: str, values):
+        values = list(values)
+        if all(isinstance(v, numbers.Real) for v in values):
+            values = array.array("d", values)
+        self._columns[name] = values
+        self._cache = {}
+
+    def __delitem__(self, name: str):
+        del self._columns[name]
+        self._cache = {}
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({ {k: list(v) for k, v in self._columns.items()} })"
+
+    @property
+    def steps(self) -> int:
+        """Number of recorded points."""
+        return len(next(iter(self._columns.values()), ()))
+
+    def _cached(self, key: str, compute: Callable):
+        """The value of compute, kept until columns or points are added or removed."""
+        # Points are appended straight to the columns, so look for new ones by the length and last point
+        first = next(iter(self._columns.values()), ())
+        version = (len(first), first[-1] if len(first) else None)
+        if self._cache.get("version") != version:
+            self._cache = {"version": version}
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def _array(self, name: str) -> np.ndarray:
+        """A column as a numpy array."""
+        return self._cached("array " + name, lambda: np.array(self[name], dtype=float))
+
+    def at(self, name: str, value, by="dist"):
+        """The value of a column where the by column reaches value, linearly interpolated.
+
+        value may be a number, or an array of them for a lookup of every 
+        one at once. NaN where it's outside of the recorded flight.
+
+        name - column to look up
+
+        value - dist or time to look it up at
+
+        by - column to look it up by, dist or time
+        """
+        if np.ndim(value) == 0:
+            keys, values = self[by], self[name]
+            i = bisect.bisect_left(keys, value)
+            if i == len(keys) or not keys[0] <= value:
+                return math.nan
+            if keys[i] == value:
+                return values[i]
+            f = (value - keys[i - 1]) / (keys[i] - keys[i - 1])
+            return values[i - 1] + f * (values[i] - values[i - 1])
+        keys = self._array(by)
+        if not len(keys):
+            return np.full(np.shape(value), math.nan)
+        return np.interp(value, keys, self._array(name), math.nan, math.nan)
+
+    def at_dist(self, name: str, dist):
+        """The value of a column at a dist or array of them, see at."""
+        return self.at(name, dist, "dist")
+
+    def at_time(self, name: str, time):
+        """The value of a column at a time or array of them, see at."""
+        return self.at(name, time, "time")
+
+    @property
+    def apex(self) -> Point:
+        """The highest recorded point."""
+        return self._cached("apex", lambda: self._point(int(np.argmax(self._array("drop")))))
+
+    @property
+    def impact(self) -> Point:
+        """The last recorded point, where the flight stopped."""
+        return self._cached("impact", lambda: self._point(self.steps - 1))
+
+    @property
+    def max_rise(self) -> float:
+        """The highest recorded drop."""
+        return self.apex.drop
+
+    def _point(self, index: int) -> Point:
+        return Point(float(self["time"][index]), float(self["dist"][index]), float(self["drop"][index]))
+
+
+class Window(Trajectory):
+    """The most recent points of a flight, older points are forgotten."""
+
+    def __init__(self, columns: dict | None = None, length=2):
+        """
+        columns - property names to initial lists of values
+        length - number of points to keep
+        """
+        self.length = length
+        super().__init__(columns)
+
+    def __setitem__(self, name: str, values):
+        self._columns[name] = collections.deque(values, self.length)
+        self._cache = {}
+
+
+def reader(projectile: Projectile, medium: Medium, name: str) -> Callable[[], float]:
+    """Work out once how to read a property of the projectile.
+
+    Returns a function of no arguments that reads an attribute or
+    property, or calls a method, passing the medium if it takes one.
+    """
+    value = getattr(projectile, name)
+    if callable(value):
+        if len(inspect.signature(value).parameters) > 0:
+            return functools.partial(value, medium)
+        return value
+    return functools.partial(getattr, projectile, name)
@@ -28,8 +28,25 @@ class Gun:
         projectile.angular_velocity = self.spin(projectile)
         projectile.angle = self.angle
 
-    def aim(self, x: float, y: float):
-        self.angle = math.atan(y / x)
+    def launch(self, spec: "projectiles.Spec") -> "projectiles.Projectile":
+        """Shoot a new projectile with the spec, the spec isn't changed."""
+        projectile = spec.create()
+        self.shoot(projectile)
+        return projectile
+
+    def aim(self, x: float, y: float, table=None):
+        """Aim at the point x/y in m.
+
+        With a table the angle accounts for drop, without one the gun is
+        aimed along the line of sight.
+
+        table - a firing table for this gun, projectile and medium, like
+        ballistics.extras.firing.FiringTable
+        """
+        if table is not None:
+            self.angle = table.angle_for(x, y)
+        else:
+            self.angle = math.atan(y / x)
 
 
 class SimpleGun(Gun):
@@ -44,6 +61,11 @@ class SimpleGun(Gun):
         self._k = k
         self._wk = wk
 
+    @property
+    def energy(self) -> float:
+        """Linear kinetic energy in Joules."""
+        return self._k
+
     def vel(self, projectile: "projectiles.Projectile"):
         return (self._k / projectile.mass * 2)**.5
 
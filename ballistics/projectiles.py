@@ -1,10 +1,66 @@
 import math
+from typing import NamedTuple
 
 from ballistics import mediums
 
 
+class Spec(NamedTuple):
+    """The fixed properties of a projectile, which can't be changed.
+
+    Specs can be shared between threads and processes, and any number of
+    projectiles can be started from the same one.
+    """
+    # Projectile subclass
+    kind: type
+    # In kg
+    mass: float
+    # In m
+    diameter: float
+    # Constant k for moment of intertia = k * mr^2
+    i_mod: float
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.kind.__name__}, mass={self.mass!r}, diameter={self.diameter!r}, i_mod={self.i_mod!r})"
+
+    def replace(self, **changes) -> "Spec":
+        """A new spec with some properties changed."""
+        return self._replace(**changes)
+
+    def create(self, state: "FlightState | None" = None) -> "Projectile":
+        """A new projectile with this spec, at rest or in the given state."""
+        return self.kind.from_spec(self, state)
+
+
+class FlightState:
+    """The properties of a projectile that change during a flight."""
+    __slots__ = ("velocity", "angle", "angular_velocity")
+
+    def __init__(self, velocity: float = 0, angle: float = 0, angular_velocity: float = 0):
+        """
+        velocity - in m/s
+        angle - in rad
+        angular_velocity - in rad/s
+        """
+        self.velocity = velocity
+        self.angle = angle
+        self.angular_velocity = angular_velocity
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return (self.velocity, self.angle, self.angular_velocity) == (other.velocity, other.angle, other.angular_velocity)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(velocity={self.velocity!r}, angle={self.angle!r}, angular_velocity={self.angular_velocity!r})"
+
+
 class Projectile:
-    """A projectile that's launched and travels through the air."""
+    """A projectile that's launched and travels through the air.
+
+    Holds an immutable Spec and the current flight state. Setting mass,
+    diameter or i_mod replaces the spec.
+    """
+    __slots__ = ("spec", "velocity", "angle", "angular_velocity")
 
     def __init__(self, mass: float, diameter: float, i_mod=0.0):
         """
@@ -12,13 +68,57 @@ class Projectile:
         diameter - in m
         i_mod - constant k for moment of intertia = k * mr^2
         """
-        self.mass = mass
-        self.diameter = diameter
-        self.i_mod = i_mod
+        self.spec = Spec(type(self), mass, diameter, i_mod)
         self.velocity = 0
         self.angular_velocity = 0
         self.angle = 0
 
+    @classmethod
+    def from_spec(cls, spec: Spec, state: FlightState | None = None) -> "Projectile":
+        """A new projectile with the spec, at rest or in the given state."""
+        projectile = cls.__new__(cls)
+        projectile.spec = spec
+        projectile.state = state or FlightState()
+        return projectile
+
+    @property
+    def state(self) -> FlightState:
+        """A copy of the current flight state."""
+        return FlightState(self.velocity, self.angle, self.angular_velocity)
+
+    @state.setter
+    def state(self, state: FlightState):
+        self.velocity = state.velocity
+        self.angle = state.angle
+        self.angular_velocity = state.angular_velocity
+
+    @property
+    def mass(self) -> float:
+        """In kg."""
+        return self.spec.mass
+
+    @mass.setter
+    def mass(self, mass: float):
+        self.spec = self.spec.replace(mass=mass)
+
+    @property
+    def diameter(self) -> float:
+        """In m."""
+        return self.spec.diameter
+
+    @diameter.setter
+    def diameter(self, diameter: float):
+        self.spec = self.spec.replace(diameter=diameter)
+
+    @property
+    def i_mod(self) -> float:
+        """Constant k for moment of intertia = k * mr^2."""
+        return self.spec.i_mod
+
+    @i_mod.setter
+    def i_mod(self, i_mod: float):
+        self.spec = self.spec.replace(i_mod=i_mod)
+
     def tick(self, medium: "mediums.Medium", time=0.0, dist=0.0) -> tuple[float, float]:
         """Progress time, apply forces return x/y distances traveled."""
         # Time for this tick
@@ -29,6 +129,27 @@ class Projectile:
         
         old_angle = self.angle
 
+        # Apply linear forces
+        acc_x, acc_y, acc_w = self.acceleration(medium)
+        vel_x = self.vel_x + acc_x * time
+        vel_y = self.vel_y + acc_y * time
+
+        if vel_x < 0:
+            vel_x = 0.000000000001
+        self.velocity = (vel_x**2 + vel_y**2)**0.5
+        self.angle = math.atan(vel_y / vel_x)
+
+        # Spin decay
+        if self.angular_velocity != 0:
+            self.angular_velocity += acc_w * time
+            # Golf balls lose ~3-4% of their spin per second
+            # self.angular_velocity *= .967**time
+        
+        # Total distance traveled
+        return dist * math.cos(old_angle), dist * math.sin(old_angle)
+
+    def acceleration(self, medium: "mediums.Medium") -> tuple[float, float, float]:
+        """X/Y accelerations in m/s^2 and angular acceleration in rad/s^2."""
         # Directional force
         force_dir = -medium.drag(self)
         force_dir -= medium.crush(self)
@@ -40,26 +161,17 @@ class Projectile:
         force_y = -medium.gravity(self)
         force_y += medium.buoyant(self)
 
-        # Apply linear forces
         # print("drag", force_dir)
         # print("lift", force_perp)
         # print("grav", force_y)
-        vel_x = self.vel_x + (force_dir * math.cos(self.angle) + force_perp * math.sin(self.angle)) / self.mass * time
-        vel_y = self.vel_y + (force_y + force_dir * math.sin(self.angle) + force_perp * math.cos(self.angle)) / self.mass * time
-
-        if vel_x < 0:
-            vel_x = 0.000000000001
-        self.velocity = (vel_x**2 + vel_y**2)**0.5
-        self.angle = math.atan(vel_y / vel_x)
+        acc_x = (force_dir * math.cos(self.angle) + force_perp * math.sin(self.angle)) / self.mass
+        acc_y = (force_y + force_dir * math.sin(self.angle) + force_perp * math.cos(self.angle)) / self.mass
 
         # Spin decay
+        acc_w = 0
         if self.angular_velocity != 0:
-            self.angular_velocity -= medium.torque(self) / self.mofinertia * time
-            # Golf balls lose ~3-4% of their spin per second
-            # self.angular_velocity *= .967**time
-        
-        # Total distance traveled
-        return dist * math.cos(old_angle), dist * math.sin(old_angle)
+            acc_w = -medium.torque(self) / self.mofinertia
+        return acc_x, acc_y, acc_w
 
     @property
     def k(self) -> float:
@@ -122,8 +234,54 @@ class Projectile:
         return medium.density * self.diameter / 2 * abs(self.w) / medium.viscosity
 
 
+# Coefficients of spheres by Reynolds number re, angular Reynolds number
+# rew and spin ratio vu (surface speed over velocity). The fused kernels
+# and the batches use these too, they work on floats or numpy arrays.
+
+def sphere_cd_laminar(re):
+    """Drag coefficient of a sphere below a Reynolds number of 9000."""
+    return 24 / re + 4 / re**.5 + .4
+
+
+def sphere_cd_turbulent(re):
+    """Drag coefficient of a smooth sphere from a Reynolds number of 9000."""
+    return (0.4274794 + 0.000001146254 * re - 7.559635 * 10**-12 * re**2 - 3.817309 * 10**-18 * re**3 + 2.389417 * 10**-23 * re**4) / (1 - 0.000002120623 * re + 2.952772 * 10**-11* re**2 - 1.914687 * 10**-16 * re**3 +  3.125996 * 10**-22 * re**4)
+
+
+def sphere_cd_spun(cd0, vu):
+    """Drag coefficient of a smooth sphere spinning forwards, from its drag coefficient without spin."""
+    return (cd0 + 2.2132291 * vu - 10.345178 * vu**2 + 16.157030 * vu**3 - 5.27306480 * vu**4) / (1 + 3.1077276 * vu - 13.6598678 * vu**2 + 24.00539887 * vu**3 - 8.340493152 * vu**4 + 0.07910093 * vu**5)
+
+
+def sphere_cl(vu):
+    """Lift coefficient of a spinning smooth sphere."""
+    return (-0.0020907 - 0.208056226 * vu + 0.768791456 * vu**2 - 0.84865215 * vu**3 + 0.75365982 * vu**4) / (1 - 4.82629033 * vu + 9.95459464 * vu**2 - 7.85649742 * vu**3 + 3.273765328 * vu**4)
+
+
+def sphere_ct(rew):
+    """Torque coefficient of a spinning sphere."""
+    return 6.45 / rew**.5 + 32.1 / rew
+
+
+def golf_ball_cd_crisis(re):
+    """Drag coefficient of a golf ball for Reynolds numbers of 50000 to 100000."""
+    return 1.29 * 10**-10 * re**2 - 2.59 * 10**-5 * re + 1.5
+
+
+def golf_ball_cd_recovery(re):
+    """Drag coefficient of a golf ball for Reynolds numbers of 100000 to 200000."""
+    return 1.91 * 10**-11 * re**2 - 5.4 * 10**-6 * re + .56
+
+
+def golf_ball_cl(vu):
+    """Lift coefficient of a golf ball spinning with a ratio of up to .3."""
+    return -3.25 * vu**2 + 1.99 * vu
+
+
 class Sphere(Projectile):
     """A smooth sphere."""
+    __slots__ = ()
+
     def __init__(self, mass: float, diameter: float, i_mod: float = .4):
         super().__init__(mass, diameter, i_mod)
 
@@ -140,30 +298,33 @@ class Sphere(Projectile):
         return self.i_mod * self.mass * self.diameter**2 / 4
     
     def cd(self, medium: "mediums.Fluid") -> float:
-        if self.re(medium) < 9000:
-            cd0 = 24 / self.re(medium) + 4 / self.re(medium)**.5 + .4
+        re = self.re(medium)
+        if re < 9000:
+            cd0 = sphere_cd_laminar(re)
         else:
-            cd0 = (0.4274794 + 0.000001146254 * self.re(medium) - 7.559635 * 10**-12 * self.re(medium)**2 - 3.817309 * 10**-18 * self.re(medium)**3 + 2.389417 * 10**-23 * self.re(medium)**4) / (1 - 0.000002120623 * self.re(medium) + 2.952772 * 10**-11* self.re(medium)**2 - 1.914687 * 10**-16 * self.re(medium)**3 +  3.125996 * 10**-22 * self.re(medium)**4)
+            cd0 = sphere_cd_turbulent(re)
         if self.angular_velocity > 0:
-            vu = self.w / self.velocity
-            cd0 = (cd0 + 2.2132291 * vu - 10.345178 * vu**2 + 16.157030 * vu**3 - 5.27306480 * vu**4) / (1 + 3.1077276 * vu - 13.6598678 * vu**2 + 24.00539887 * vu**3 - 8.340493152 * vu**4 + 0.07910093 * vu**5)
+            cd0 = sphere_cd_spun(cd0, self.w / self.velocity)
         return cd0
 
     def cl(self, medium: "mediums.Fluid") -> float:
         vu = self.w / self.velocity
         if vu == 0:
             return 0
-        return (-0.0020907 - 0.208056226 * vu + 0.768791456 * vu**2 - 0.84865215 * vu**3 + 0.75365982 * vu**4) / (1 - 4.82629033 * vu + 9.95459464 * vu**2 - 7.85649742 * vu**3 + 3.273765328 * vu**4)
+        return sphere_cl(vu)
 
     def ct(self, medium: "mediums.Fluid") -> float:
-        if self.rew(medium) > 0:
-            return 6.45 / self.rew(medium)**.5 + 32.1 / self.rew(medium)
+        rew = self.rew(medium)
+        if rew > 0:
+            return sphere_ct(rew)
         else:
             return 0
 
 
 class GolfBall(Sphere):
     """A golf ball (dimpled sphere)."""
+    __slots__ = ()
+
     def __init__(self, mass: float, diameter: float, i_mod: float = .3):
         super().__init__(mass, diameter, i_mod)
     
@@ -172,14 +333,15 @@ class GolfBall(Sphere):
         return self.i_mod * self.mass * self.diameter**2 / 4
     
     def cd(self, medium: "mediums.Fluid") -> float:
-        if self.re(medium) < 9000:
-            return 24 / self.re(medium) + 4 / self.re(medium)**.5 + .4
-        elif self.re(medium) < 50000:
+        re = self.re(medium)
+        if re < 9000:
+            return sphere_cd_laminar(re)
+        elif re < 50000:
             return .5
-        elif self.re(medium) < 100000:
-            return 1.29 * 10**-10 * self.re(medium)**2 - 2.59 * 10**-5 * self.re(medium) + 1.5
-        elif self.re(medium) < 200000:
-            return 1.91 * 10**-11 * self.re(medium)**2 - 5.4 * 10**-6 * self.re(medium) + .56
+        elif re < 100000:
+            return golf_ball_cd_crisis(re)
+        elif re < 200000:
+            return golf_ball_cd_recovery(re)
         else:
             return .4
     
@@ -189,10 +351,11 @@ class GolfBall(Sphere):
             return .3
         if vu == 0:
             return 0
-        return -3.25 * vu**2 + 1.99 * vu
+        return golf_ball_cl(vu)
     
     def ct(self, medium: "mediums.Fluid") -> float:
         # Formula from the Airsoft Trajectory Project. This needs to be 
         # verified by some other source though. Otherwise a constant of 
         # 1 seems to be fairly accurate.
-        return 6.45 / self.rew(medium)**.5 + 32.1 / self.rew(medium)
+        rew = self.rew(medium)
+        return sphere_ct(rew)
@@ -0,0 +1,57 @@
+"""Compare Projectile.tick with the fused step kernels.
+
+Fails if a kernel doesn't give exactly the same results as tick.
+
+Run with python -m benchmarks.kernels from the repository root.
+"""
+import copy
+import time
+
+from ballistics.extras import config
+from ballistics.extras import kernels
+
+CASES = (("6mm0.20", "airsoftgun", "air_atp", 3000),
+         ("golfball", "driver", "air_atp", 3000),
+         ("68calpaint", "68calmarker", "water_20c", 0),
+         ("6mm0.20", "airsoftgun", "vaccum", 0))
+STEPS = 20000
+TIME_STEP = 0.0001
+
+
+def launch(projectile_name: str, gun_name: str, spin: float):
+    spec = config.projectile_list[projectile_name].spec
+    gun = copy.copy(config.gun_list[gun_name])
+    gun.set_spin(spin, spec.create())
+    return gun.launch(spec)
+
+
+def main():
+    drifted = []
+    for projectile_name, gun_name, medium_name, spin in CASES:
+        medium = getattr(config, medium_name)
+
+        projectile = launch(projectile_name, gun_name, spin)
+        start = time.perf_counter()
+        for _ in range(STEPS):
+            projectile.tick(medium, TIME_STEP)
+        tick = STEPS / (time.perf_counter() - start)
+        expected = (projectile.velocity, projectile.angle, projectile.angular_velocity)
+
+        projectile = launch(projectile_name, gun_name, spin)
+        start = time.perf_counter()
+        run = kernels.compile_step(projectile, medium)
+        for _ in range(STEPS):
+            kernels.step(projectile, run, TIME_STEP)
+        fused = STEPS / (time.perf_counter() - start)
+        same = expected == (projectile.velocity, projectile.angle, projectile.angular_velocity)
+
+        print(f"{projectile_name} in {medium_name}: tick {tick:,.0f} steps/s, "
+              f"kernel {fused:,.0f} steps/s, {fused / tick:.1f}x, identical: {same}")
+        if not same:
+            drifted.append(projectile_name + " in " + medium_name)
+    if drifted:
+        raise SystemExit("kernels don't match Projectile.tick for " + ", ".join(drifted))
+
+
+if __name__ == "__main__":
+    main()
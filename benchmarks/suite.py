@@ -0,0 +1,149 @@
+"""Benchmark suite for tick, sim and the ranging solvers.
+
+Every scenario is fixed, so runs on the same machine can be compared.
+Each reports steps per second, trajectories per second, peak memory and
+its error against a high resolution reference of the same scenario.
+
+Run with python -m benchmarks.suite from the repository root, see --help.
+Save a run with --output, then check a later run against it with
+--compare, which exits with status 1 if a scenario got slower or less
+accurate by more than the threshold.
+"""
+import argparse
+import copy
+import json
+import sys
+import time
+import tracemalloc
+from typing import Callable
+from typing import NamedTuple
+
+from ballistics.extras import config
+from ballistics.extras import ranging
+
+
+class Run(NamedTuple):
+    """What one run of a scenario did: integration steps, trajectories and the answer."""
+    steps: int | None
+    trajectories: int
+    result: float
+
+
+class Scenario(NamedTuple):
+    """A benchmark and a much more accurate way to get its answer."""
+    run: Callable[[], Run]
+    reference: Callable[[], float]
+
+
+def _shot(projectile: str, gun: str, medium: str, drop: float, spin: float | None = None,
+          time_step=0.001, tolerance: float | None = None) -> Run:
+    """Fly one shot, the answer is its range."""
+    gun = copy.copy(config.gun_list[gun])
+    spec = config.projectile_list[projectile].spec
+    if spin is not None:
+        gun.set_spin(spin, spec.create())
+    r = ranging.sim(gun.launch(spec), getattr(config, medium), time_step=time_step, drop=drop, tolerance=tolerance)
+    return Run(r.steps - 1, 1, r["dist"][-1])
+
+
+def _get_spin(time_step=0.001, tolerance: float | None = None) -> Run:
+    solution = ranging.solve_spin(config.projectile_list["6mm0.20"], config.gun_list["airsoftgun"],
+                                  config.air_atp, 1.5, .1, time_step, tolerance)
+    return Run(None, solution.sims, solution.spin)
+
+
+def _max_range(time_step=0.001, tolerance: float | None = None) -> Run:
+    solution = ranging.solve_range(config.projectile_list["6mm0.20"], config.gun_list["airsoftgun"],
+                                   config.air_atp, 1.5, time_step, tolerance)
+    return Run(None, solution.sims, solution.range)
+
+
+# The references use adaptive steps with a tight tolerance
+SCENARIOS = {
+    "bb": Scenario(lambda: _shot("6mm0.20", "airsoftgun", "air_atp", 1.5, 12000),
+                   lambda: _shot("6mm0.20", "airsoftgun", "air_atp", 1.5, 12000, tolerance=1e-10).result),
+    "driver": Scenario(lambda: _shot("golfball", "driver", "air_atp", 0),
+                       lambda: _shot("golfball", "driver", "air_atp", 0, tolerance=1e-10).result),
+    "paintball": Scenario(lambda: _shot("68calpaint", "68calmarker", "water_20c", 1.5),
+                          lambda: _shot("68calpaint", "68calmarker", "water_20c", 1.5, tolerance=1e-10).result),
+    "get_spin": Scenario(_get_spin, lambda: _get_spin(tolerance=1e-9).result),
+    "max_range": Scenario(_max_range, lambda: _max_range(tolerance=1e-9).result),
+}
+
+# Results compared between runs, and whether higher is better
+METRICS = {"steps_per_s": True, "trajectories_per_s": True, "peak_memory": False, "error": False}
+
+
+def measure(scenario: Scenario, min_time=1.0) -> dict[str, float | None]:
+    """Run a scenario repeatedly for at least min_time s and report its best speed."""
+    best = None
+    spent = 0.0
+    while spent < min_time:
+        start = time.perf_counter()
+        run = scenario.run()
+        elapsed = time.perf_counter() - start
+        spent += elapsed
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    scenario.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    reference = scenario.reference()
+    return {"seconds": best,
+            "steps_per_s": None if run.steps is None else run.steps / best,
+            "trajectories_per_s": run.trajectories / best,
+            "peak_memory": peak,
+            "result": run.result,
+            "reference": reference,
+            "error": abs(run.result - reference) / abs(reference)}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Every metric that's worse than the baseline by more than the threshold, as a relative change."""
+    regressions = []
+    for name, metrics in results.items():
+        for metric, higher in METRICS.items():
+            new, old = metrics.get(metric), baseline.get(name, {}).get(metric)
+            if new is None or old is None or old == 0:
+                continue
+            change = (new - old) / abs(old)
+            if (-change if higher else change) > threshold:
+                regressions.append(f"{name} {metric}: {old:.4g} -> {new:.4g} ({change:+.1%})")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", help=f"scenarios to run from {', '.join(SCENARIOS)}, default all")
+    parser.add_argument("--min-time", default=1.0, type=float, help="seconds to repeat each scenario for")
+    parser.add_argument("--output", help="JSON file to save the results to")
+    parser.add_argument("--compare", help="JSON file of an earlier run to check for regressions against")
+    parser.add_argument("--threshold", default=0.1, type=float, help="relative change counted as a regression")
+    args = parser.parse_args(argv)
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name}")
+
+    results = {}
+    for name in args.scenarios or SCENARIOS:
+        results[name] = metrics = measure(SCENARIOS[name], args.min_time)
+        steps = "" if metrics["steps_per_s"] is None else f"{metrics['steps_per_s']:12,.0f} steps/s"
+        print(f"{name:10} {steps:20} {metrics['trajectories_per_s']:10,.1f} traj/s "
+              f"{metrics['peak_memory'] / 1024:10,.0f} KiB {metrics['error']:10.2e} error")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": sys.version, "results": results}, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+        for regression in regressions:
+            print("regression:", regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""The closed form flights in drag-free mediums against stepped ones."""
+import copy
+
+import numpy as np
+
+from ballistics.extras import batch
+from ballistics.extras import config
+from ballistics.extras import dispersion
+from ballistics.extras import ranging
+from ballistics.mediums import Medium
+
+
+class Stepped(Medium):
+    """A vacuum that analytic.drag_free doesn't trust, so its flights are stepped."""
+
+
+VACUUM = Stepped(density=0, g=9.8, speed_of_sound=0)
+TIME_STEP = 0.001
+# Stepped flights drift from the exact ones by about the time step over a whole flight
+RTOL = 1e-3
+
+
+def shot(angle: float) -> tuple:
+    gun = copy.copy(config.gun_list["airsoftgun"])
+    gun.angle = angle
+    return config.projectile_list["6mm0.20"], gun
+
+
+def test_sim_on_flat_ground():
+    projectile, gun = shot(.3)
+    exact = ranging.sim(gun.launch(projectile.spec), config.vaccum, time_step=TIME_STEP, drop=0)
+    stepped = ranging.sim(gun.launch(projectile.spec), VACUUM, time_step=TIME_STEP, drop=0)
+    assert np.isclose(exact.impact.time, stepped.impact.time, rtol=RTOL)
+    assert np.isclose(exact.impact.dist, stepped.impact.dist, rtol=RTOL)
+
+
+def test_sim_batch_on_flat_ground():
+    pairs = [shot(angle) for angle in (.05, .3, .7)]
+    exact = ranging.sim_batch(pairs, config.vaccum, 0, time_step=TIME_STEP)
+    stepped = ranging.sim_batch(pairs, VACUUM, 0, time_step=TIME_STEP)
+    assert exact["hit"].all() and stepped["hit"].all()
+    assert np.allclose(exact["dist"], stepped["dist"], rtol=RTOL)
+
+
+def test_crossings_on_flat_ground():
+    projectile, gun = shot(.3)
+    shots = batch.from_spec(projectile.spec, [gun.vel(projectile)] * 2, 0, [.05, .3])
+    dists = [10, 100, 500]
+    exact = dispersion.crossings(shots, config.vaccum, dists, 0, TIME_STEP)
+    stepped = dispersion.crossings(copy.deepcopy(shots), VACUUM, dists, 0, TIME_STEP)
+    assert np.array_equal(np.isnan(exact["drop"]), np.isnan(stepped["drop"]))
+    assert not np.isnan(exact["drop"]).all()
+
+
+def test_solve_spin_rising_first():
+    projectile, gun = shot(.7)
+    assert ranging.solve_spin(projectile, gun, config.vaccum, 0, .1).spin == -1
+    assert ranging.solve_spin(projectile, gun, VACUUM, 0, .1).spin == -1
+